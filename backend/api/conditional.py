@@ -0,0 +1,50 @@
+import hashlib
+
+from django.db.models import Max
+
+from api.versions import bump_versions, get_version, new_timestamp
+
+CONTENT_VERSION_KEY = 'recipes_content_version'
+USER_VERSION_KEY = 'recipes_user_version:{user_id}'
+
+
+def bump_content_version():
+    """Отмечает изменение данных, от которых зависят все рецепты:
+    тегов, ингредиентов, авторов, а также удаление рецептов."""
+    bump_versions((CONTENT_VERSION_KEY,), new_timestamp)
+
+
+def bump_user_versions(*user_ids):
+    """Отмечает изменение избранного, списка покупок или подписок
+    пользователей."""
+    bump_versions(
+        [USER_VERSION_KEY.format(user_id=user_id) for user_id in user_ids],
+        new_timestamp
+    )
+
+
+def get_recipes_validators(queryset, user):
+    """ETag и Last-Modified для ответа с рецептами queryset.
+    Считаются одним агрегирующим запросом без сериализации: по времени
+    последнего изменения рецептов, а также по версиям общих данных
+    и избранного, списка покупок и подписок пользователя. Удаление
+    рецептов и изменения, из-за которых рецепт выпадает из фильтра,
+    меняют эти версии, поэтому число рецептов не считается.
+    Если рецептов нет, возвращает None."""
+    updated_at = queryset.order_by().aggregate(
+        updated_at=Max('updated_at')
+    )['updated_at']
+    if updated_at is None:
+        return None
+    versions = [get_version(CONTENT_VERSION_KEY, new_timestamp)]
+    if user.is_authenticated:
+        versions.append(get_version(
+            USER_VERSION_KEY.format(user_id=user.id),
+            new_timestamp
+        ))
+    last_modified = max(updated_at.timestamp(), *versions)
+    etag = hashlib.md5(
+        f"{updated_at.isoformat()}:{':'.join(map(str, versions))}:"
+        f"{user.id}".encode()
+    ).hexdigest()
+    return f'"{etag}"', int(last_modified)
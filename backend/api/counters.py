@@ -0,0 +1,22 @@
+from django.db.models import F
+
+
+class CountersMixin:
+    """Модель с денормализованными счётчиками counter_fields.
+    Счётчики меняются только выражениями F() через change_counter,
+    поэтому при сохранении загруженного объекта они не перезаписываются."""
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+def change_counter(model, pks, field, delta):
+    """Изменяет счётчик объектов pks на delta одним UPDATE."""
+    model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
@@ -0,0 +1,54 @@
+import logging
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from api.pools import run_in_pools
+from api.renderers import SHOPPING_LIST_RENDERERS
+from api.shopping_list import get_shopping_list
+from recipes.models import ShoppingListExport
+
+logger = logging.getLogger(__name__)
+
+RENDERERS = {renderer.format: renderer for renderer in SHOPPING_LIST_RENDERERS}
+
+
+def render_document(format, ingredients):
+    """Формирует документ со списком покупок."""
+    return b''.join(RENDERERS[format]().render_stream(ingredients))
+
+
+def finish_export(export_id, document):
+    """Сохраняет готовый документ или отмечает выгрузку неудачной.
+    Ошибка при сохранении документа тоже отмечает выгрузку неудачной,
+    чтобы она не оставалась в статусе pending."""
+    export = ShoppingListExport.objects.get(pk=export_id)
+    if document is not None:
+        try:
+            export.file.save(
+                f'{uuid4().hex}.{export.format}',
+                ContentFile(document),
+                save=False
+            )
+            export.status = ShoppingListExport.READY
+            export.save(update_fields=('file', 'status'))
+            return
+        except Exception:
+            logger.exception('Не удалось сохранить выгрузку %s', export.id)
+    export.status = ShoppingListExport.FAILED
+    export.save(update_fields=('status',))
+
+
+def start_export(export):
+    """Запускает формирование документа для выгрузки.
+    Список покупок собирается в БД сразу, документ формируется в пуле
+    процессов. При SHOPPING_LIST_EXPORT_WORKERS = 0 документ формируется
+    в текущем потоке, что удобно для тестов."""
+    run_in_pools(
+        settings.SHOPPING_LIST_EXPORT_WORKERS,
+        render_document,
+        (export.format, list(get_shopping_list(export.user))),
+        finish_export,
+        (export.id,)
+    )
@@ -1,7 +1,26 @@
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Ingredient, Recipe
+from api.recipes_search import search_recipes
+from recipes.models import Ingredient, Recipe, Tag
+
+TAG_IDS_KEY = 'tag_ids'
+
+
+def get_tag_ids():
+    """Словарь «слаг тега → id» из кэша.
+    Сбрасывается при изменении тегов."""
+    tag_ids = cache.get(TAG_IDS_KEY)
+    if tag_ids is None:
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(TAG_IDS_KEY, tag_ids, None)
+    return tag_ids
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
 
 
 class IngredientSearch(SearchFilter):
@@ -14,8 +33,13 @@ class IngredientSearch(SearchFilter):
 
 
 class RecipeFilter(FilterSet):
-    """Фильтр рецептов по автору/тегу/избранному/наличию в списке покупок."""
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    """Фильтр рецептов по автору/тегу/избранному/наличию в списке покупок.
+    Полнотекстовый поиск по названию, описанию и ингредиентам."""
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices,
+        method='filter_tags'
+    )
+    search = filters.CharFilter(method='filter_search')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
@@ -23,7 +47,24 @@ class RecipeFilter(FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author',
+            'tags',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'search'
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """Фильтр рецептов, у которых есть хотя бы один из тегов.
+        Проверяется подзапросом EXISTS, поэтому рецепты не дублируются."""
+        tag_ids = get_tag_ids()
+        return queryset.annotate(has_tags=Exists(
+            Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                tag_id__in=[tag_ids[slug] for slug in value]
+            )
+        )).filter(has_tags=True)
 
     def filter_is_favorited(self, queryset, name, value):
         """Фильтр рецептов, находящихся в избранном."""
@@ -36,3 +77,9 @@ class RecipeFilter(FilterSet):
         if value and self.request.user.is_authenticated:
             return queryset.filter(shopping_cart__user=self.request.user)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Поиск рецептов с сортировкой по релевантности."""
+        if value:
+            return search_recipes(queryset, value)
+        return queryset
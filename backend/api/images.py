@@ -0,0 +1,133 @@
+import binascii
+import io
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from api.pools import run_in_pools
+from recipes.models import Recipe
+
+MAX_DIMENSION = 1600
+RENDITIONS = {
+    'thumbnail': (320, 320),
+    'card': (800, 800),
+}
+JPEG_QUALITY = 85
+DECODE_CHUNK_SIZE = 64 * 1024
+MAX_MEMORY_SIZE = 1024 * 1024
+IMAGE_NAME = 'img.jpg'
+
+
+def decode_base64(data):
+    """Декодирует изображение из base64 частями во временный файл.
+    Размер проверяется по длине строки до декодирования."""
+    if len(data) // 4 * 3 > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise ValidationError(
+            'Размер изображения не должен превышать '
+            f'{settings.IMAGE_UPLOAD_MAX_SIZE // (1024 * 1024)} МБ'
+        )
+    file = SpooledTemporaryFile(max_size=MAX_MEMORY_SIZE)
+    try:
+        for start in range(0, len(data), DECODE_CHUNK_SIZE):
+            file.write(binascii.a2b_base64(
+                data[start:start + DECODE_CHUNK_SIZE]
+            ))
+    except (binascii.Error, ValueError):
+        file.close()
+        raise ValidationError('Некорректное изображение в base64')
+    file.seek(0)
+    return File(file, name=IMAGE_NAME)
+
+
+def encode_image(file, size, max_pixels=None):
+    """Уменьшает изображение до размеров size с сохранением пропорций
+    и кодирует в jpeg. Прозрачный фон заменяется белым.
+    Число пикселей проверяется по заголовку файла до декодирования."""
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        if max_pixels and width * height > max_pixels:
+            raise ValidationError(
+                'Изображение не должно превышать '
+                f'{max_pixels / 1000000:g} Мпикс'
+            )
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(
+            buffer,
+            'JPEG',
+            quality=JPEG_QUALITY,
+            optimize=True,
+            progressive=True
+        )
+    return buffer.getvalue()
+
+
+def bound_image(file):
+    """Картинка рецепта, уменьшенная до MAX_DIMENSION по большей стороне."""
+    try:
+        content = encode_image(
+            file,
+            (MAX_DIMENSION, MAX_DIMENSION),
+            settings.IMAGE_UPLOAD_MAX_PIXELS
+        )
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Некорректное изображение')
+    return ContentFile(content, name=IMAGE_NAME)
+
+
+def render_renditions(content):
+    """Уменьшенные копии картинки по RENDITIONS."""
+    return {
+        name: encode_image(io.BytesIO(content), size)
+        for name, size in RENDITIONS.items()
+    }
+
+
+def save_renditions(recipe_id, image, renditions):
+    """Сохраняет копии картинки, если они готовы и картинка рецепта
+    не сменилась. Пока копий нет, сериализаторы отдают исходную картинку."""
+    if renditions is None:
+        return
+    recipe = Recipe.objects.filter(pk=recipe_id, image=image).first()
+    if recipe is None:
+        return
+    names = {}
+    for name, content in renditions.items():
+        field = Recipe._meta.get_field(name)
+        names[name] = field.storage.save(
+            field.generate_filename(recipe, IMAGE_NAME),
+            ContentFile(content)
+        )
+    Recipe.objects.filter(pk=recipe_id, image=image).update(
+        updated_at=timezone.now(),
+        **names
+    )
+
+
+def start_renditions(recipe):
+    """Запускает подготовку уменьшенных копий картинки рецепта.
+    При IMAGE_PROCESSING_WORKERS = 0 копии готовятся в текущем потоке."""
+    with recipe.image.open('rb') as file:
+        content = file.read()
+    run_in_pools(
+        settings.IMAGE_PROCESSING_WORKERS,
+        render_renditions,
+        (content,),
+        save_renditions,
+        (recipe.id, recipe.image.name)
+    )
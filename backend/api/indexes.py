@@ -0,0 +1,80 @@
+from django.core.cache import cache
+
+from api.versions import bump_versions, get_version
+
+CHANGES_TIMEOUT = 24 * 60 * 60
+MAX_CHANGES = 1000
+
+
+class VersionedIndex:
+    """Индекс в памяти процесса, построенный по данным из БД.
+    Строится при первом запросе и перестраивается, когда в кэше меняется
+    версия индекса под ключом version_key. Наследники реализуют build.
+
+    changed записывает id изменённых объектов в журнал в кэше под номером
+    из счётчика, а refresh каждого процесса применяет новые записи
+    через update. Наследники, реализующие update, обновляются частично,
+    остальные строятся заново. Если записи журнала пропали из кэша,
+    индекс тоже строится заново."""
+    version_key = None
+
+    def __init__(self):
+        self.version = None
+        self.change = 0
+
+    @property
+    def counter_key(self):
+        return f'{self.version_key}:changes'
+
+    def change_key(self, number):
+        return f'{self.version_key}:change:{number}'
+
+    def build(self):
+        raise NotImplementedError('Индекс должен реализовать метод build()')
+
+    def update(self, ids):
+        self.rebuild(self.version)
+
+    def rebuild(self, version):
+        cache.add(self.counter_key, 0, None)
+        self.change = cache.get(self.counter_key, 0)
+        self.build()
+        self.version = version
+
+    def refresh(self):
+        """Перестраивает индекс, если он устарел,
+        или применяет к нему новые записи журнала изменений."""
+        version = get_version(self.version_key)
+        if version != self.version:
+            self.rebuild(version)
+            return
+        last = cache.get(self.counter_key, self.change)
+        if last == self.change:
+            return
+        numbers = range(self.change + 1, last + 1)
+        if last < self.change or len(numbers) > MAX_CHANGES:
+            self.rebuild(version)
+            return
+        changes = cache.get_many([self.change_key(n) for n in numbers])
+        if len(changes) < len(numbers):
+            self.rebuild(version)
+            return
+        self.update(set().union(*changes.values()))
+        self.change = last
+
+    def changed(self, ids):
+        """Записывает в журнал изменение объектов ids.
+        Если счётчика журнала нет в кэше, индекс помечается устаревшим,
+        чтобы процессы с прежними номерами записей построили его заново."""
+        if cache.add(self.counter_key, 0, None):
+            self.invalidate()
+        try:
+            number = cache.incr(self.counter_key)
+        except ValueError:
+            self.invalidate()
+            return
+        cache.set(self.change_key(number), list(ids), CHANGES_TIMEOUT)
+
+    def invalidate(self):
+        """Помечает индекс устаревшим во всех процессах."""
+        bump_versions((self.version_key,))
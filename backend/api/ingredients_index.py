@@ -0,0 +1,148 @@
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from api.indexes import VersionedIndex
+from recipes.models import Ingredient
+
+SIMILARITY_THRESHOLD = 0.3
+WORD_RE = re.compile(r'\w+')
+
+
+def get_trigrams(text):
+    """Триграммы слов текста, дополненных пробелами как в pg_trgm."""
+    trigrams = set()
+    for word in WORD_RE.findall(text):
+        word = f'  {word} '
+        trigrams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return trigrams
+
+
+def get_substrings(text):
+    """Все подстроки текста длиной в три символа."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def get_range(keys, prefix):
+    """Позиции отсортированного списка keys, начинающихся с prefix."""
+    position = bisect_left(keys, prefix)
+    while position < len(keys) and keys[position].startswith(prefix):
+        yield position
+        position += 1
+
+
+class IngredientIndex(VersionedIndex):
+    """Поисковый индекс ингредиентов в памяти процесса.
+    Хранит отсортированные по названию ингредиенты, отсортированные
+    слова названий и триграммы, поэтому поиск не обращается к БД."""
+    version_key = 'ingredients_index_version'
+
+    def __init__(self):
+        super().__init__()
+        self.keys = []
+        self.items = []
+        self.words = []
+        self.word_positions = []
+        self.substrings = {}
+        self.trigrams = {}
+        self.trigram_counts = []
+
+    def build(self):
+        ingredients = sorted(
+            (name.casefold(), name, id, measurement_unit)
+            for id, name, measurement_unit in Ingredient.objects.values_list(
+                'id',
+                'name',
+                'measurement_unit'
+            )
+        )
+        self.keys = [key for key, *_ in ingredients]
+        self.items = [
+            {'id': id, 'name': name, 'measurement_unit': measurement_unit}
+            for _, name, id, measurement_unit in ingredients
+        ]
+        words = sorted(
+            (match.group(), position)
+            for position, key in enumerate(self.keys)
+            for match in WORD_RE.finditer(key)
+            if match.start()
+        )
+        self.words = [word for word, _ in words]
+        self.word_positions = [position for _, position in words]
+        substrings, trigrams = defaultdict(set), defaultdict(list)
+        self.trigram_counts = []
+        for position, key in enumerate(self.keys):
+            for substring in get_substrings(key):
+                substrings[substring].add(position)
+            key_trigrams = get_trigrams(key)
+            self.trigram_counts.append(len(key_trigrams))
+            for trigram in key_trigrams:
+                trigrams[trigram].append(position)
+        self.substrings = dict(substrings)
+        self.trigrams = dict(trigrams)
+
+    def prefix_matches(self, query):
+        """Названия, начинающиеся с запроса, по алфавиту."""
+        return get_range(self.keys, query)
+
+    def word_matches(self, query):
+        """Названия, одно из следующих слов которых начинается с запроса."""
+        for position in get_range(self.words, query):
+            yield self.word_positions[position]
+
+    def substring_matches(self, query):
+        """Названия, содержащие запрос, ближе к началу — выше.
+        Кандидаты отбираются пересечением списков подстрок запроса
+        длиной в три символа."""
+        postings = [
+            self.substrings.get(substring, set())
+            for substring in get_substrings(query)
+        ]
+        if postings:
+            candidates = set.intersection(*postings)
+        else:
+            candidates = range(len(self.keys))
+        found = [
+            (self.keys[position].find(query), position)
+            for position in candidates
+            if query in self.keys[position]
+        ]
+        return (position for _, position in sorted(found))
+
+    def similar_matches(self, query):
+        """Названия, похожие на запрос по доле общих триграмм,
+        что находит их и при опечатках в запросе."""
+        query_trigrams = get_trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.trigrams.get(trigram, ()))
+        found = []
+        for position, count in shared.items():
+            similarity = count / (
+                len(query_trigrams) + self.trigram_counts[position] - count
+            )
+            if similarity >= SIMILARITY_THRESHOLD:
+                found.append((-similarity, position))
+        return (position for _, position in sorted(found))
+
+    def search(self, query, limit):
+        """Не более limit ингредиентов, подходящих под запрос без учёта
+        регистра. Сначала идут совпадения по началу названия, затем
+        по началу слова, затем по подстроке, затем похожие названия."""
+        self.refresh()
+        query = query.casefold().strip()
+        found = {}
+        for tier in (
+            self.prefix_matches,
+            self.word_matches,
+            self.substring_matches,
+            self.similar_matches
+        ):
+            for position in tier(query):
+                if len(found) >= limit:
+                    return list(found.values())
+                found.setdefault(position, self.items[position])
+        return list(found.values())
+
+
+ingredients_index = IngredientIndex()
@@ -1,6 +1,271 @@
+import hashlib
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as DecodeError
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.versions import bump_versions, get_version
+
+CURSOR_QUERY_PARAM = 'cursor'
+CURSOR_ORDERING = ('-pub_date', '-id')
+INVALID_CURSOR_MESSAGE = 'Неверный курсор.'
+COUNTS_VERSION_KEY = 'counts_version'
+COUNT_KEY = 'count:{version}:{query}'
+COUNT_CACHE_TIMEOUT = 60
+APPROXIMATE_COUNT_THRESHOLD = 100000
+
+
+def reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
+
+
+def bump_counts_version():
+    """Сбрасывает закэшированные количества объектов в списках.
+    Вызывается при создании и удалении рецептов, пользователей,
+    подписок, избранного и корзины."""
+    bump_versions((COUNTS_VERSION_KEY,))
+
+
+def get_count_queryset(queryset):
+    """Запрос для подсчёта без сортировки и аннотаций, например флагов
+    избранного и списка покупок пользователя. Условия фильтров по
+    аннотациям уже перенесены в WHERE и остаются в силе."""
+    queryset = queryset.order_by()
+    queryset.query.annotations.clear()
+    queryset.query.set_annotation_mask(None)
+    return queryset
+
+
+def get_estimated_count(queryset):
+    """Оценка числа строк таблицы по статистике PostgreSQL или None,
+    если оценка недоступна или таблица невелика."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            (queryset.model._meta.db_table,)
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < APPROXIMATE_COUNT_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+class CountCachingPaginator(Paginator):
+    """Пагинатор, количество объектов для которого считает
+    get_count пагинации."""
+
+    def __init__(self, object_list, per_page, get_count):
+        super().__init__(object_list, per_page)
+        self.get_count = get_count
+
+    @cached_property
+    def count(self):
+        return self.get_count(self.object_list)
 
 
 class LimitPageNumberPagination(PageNumberPagination):
-    """Пагинатор вывода количества объектов и номера страницы."""
+    """Пагинатор вывода количества объектов и номера страницы.
+    С параметром cursor переключается на курсорную пагинацию по полям
+    cursor_ordering вьюсета: страница выбирается условием
+    WHERE (pub_date, id) < (...) без OFFSET и COUNT(*)."""
     page_size_query_param = 'limit'
+    cursor_query_param = CURSOR_QUERY_PARAM
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = False
+        if (
+            self.cursor_query_param not in request.query_params
+            or not isinstance(queryset, QuerySet)
+        ):
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        ordering = getattr(view, 'cursor_ordering', CURSOR_ORDERING)
+        self.fields = [
+            queryset.model._meta.get_field(field.lstrip('-'))
+            for field in ordering
+        ]
+        position, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            ordering = reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, position)
+            )
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if self.reverse:
+            results.reverse()
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = has_more if self.reverse else position is not None
+        self.page = results
+        self.keyset = True
+        return results
+
+    def get_keyset_filter(self, ordering, position):
+        """Условие «после позиции» для сортировки по нескольким полям:
+        (a > x) OR (a = x AND b > y) OR ..."""
+        condition, equal = Q(), {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def decode_cursor(self, request):
+        """Позиция и направление из параметра cursor.
+        Пустой курсор означает первую страницу."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, cursor['p'])
+            ]
+            reverse = bool(cursor.get('r'))
+        except (
+            DecodeError,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValidationError,
+            ValueError
+        ):
+            raise NotFound(INVALID_CURSOR_MESSAGE)
+        if len(position) != len(self.fields) or None in position:
+            raise NotFound(INVALID_CURSOR_MESSAGE)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        cursor = {
+            'p': [field.value_to_string(instance) for field in self.fields]
+        }
+        if reverse:
+            cursor['r'] = 1
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            b64encode(json.dumps(cursor).encode()).decode('ascii')
+        )
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class CachedCountPagination(LimitPageNumberPagination):
+    """Пагинатор с кэшированием количества объектов.
+    Количество хранится в кэше COUNT_CACHE_TIMEOUT секунд по ключу
+    из пути и параметров фильтров, то есть отдельно для каждого набора
+    фильтров. Id пользователя входит в ключ, только если от пользователя
+    зависит список: в действиях из user_count_actions вьюсета и при
+    фильтрах из его user_count_params.
+    Для больших таблиц без фильтров берётся оценка PostgreSQL,
+    тогда в ответе is_count_exact = False."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountCachingPaginator(object_list, per_page, self.get_count)
+
+    def get_count_key(self):
+        pagination_params = (
+            self.page_query_param,
+            self.page_size_query_param,
+            self.cursor_query_param
+        )
+        params = sorted(
+            (name, sorted(values))
+            for name, values in self.request.query_params.lists()
+            if name not in pagination_params
+        )
+        user_id = None
+        if getattr(self.view, 'action', None) in getattr(
+            self.view,
+            'user_count_actions',
+            ()
+        ) or any(
+            name in self.request.query_params
+            for name in getattr(self.view, 'user_count_params', ())
+        ):
+            user_id = self.request.user.id
+        return hashlib.md5(
+            f'{self.request.path}:{params!r}:{user_id}'.encode()
+        ).hexdigest()
+
+    def get_count(self, object_list):
+        self.is_count_exact = True
+        if not isinstance(object_list, QuerySet):
+            return len(object_list)
+        queryset = get_count_queryset(object_list)
+        if not queryset.query.where and not queryset.query.distinct:
+            count = get_estimated_count(queryset)
+            if count is not None:
+                self.is_count_exact = False
+                return count
+        key = COUNT_KEY.format(
+            version=get_version(COUNTS_VERSION_KEY),
+            query=self.get_count_key()
+        )
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('is_count_exact', self.is_count_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
@@ -0,0 +1,76 @@
+from array import array
+from collections import Counter, defaultdict
+
+from api.indexes import VersionedIndex
+from recipes.models import RecipeIngredient
+
+
+class PantryIndex(VersionedIndex):
+    """Индекс «ингредиент → рецепты» в памяти процесса.
+    Для каждого ингредиента хранит массив id рецептов, для каждого
+    рецепта — id его ингредиентов. После изменения рецептов обновляются
+    только их записи."""
+    version_key = 'pantry_index_version'
+
+    def __init__(self):
+        super().__init__()
+        self.postings = {}
+        self.recipes = {}
+
+    def build(self):
+        postings, recipes = defaultdict(lambda: array('l')), defaultdict(list)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.values_list(
+            'recipe_id',
+            'ingredient_id'
+        ).order_by('recipe_id'):
+            postings[ingredient_id].append(recipe_id)
+            recipes[recipe_id].append(ingredient_id)
+        self.postings = dict(postings)
+        self.recipes = {
+            recipe_id: tuple(ingredient_ids)
+            for recipe_id, ingredient_ids in recipes.items()
+        }
+
+    def update(self, recipe_ids):
+        """Перечитывает ингредиенты рецептов recipe_ids одним запросом."""
+        current = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            current[recipe_id].add(ingredient_id)
+        for recipe_id in recipe_ids:
+            old = set(self.recipes.pop(recipe_id, ()))
+            new = current.get(recipe_id, set())
+            for ingredient_id in old - new:
+                self.postings[ingredient_id].remove(recipe_id)
+            for ingredient_id in new - old:
+                self.postings.setdefault(
+                    ingredient_id,
+                    array('l')
+                ).append(recipe_id)
+            if new:
+                self.recipes[recipe_id] = tuple(new)
+
+    def search(self, ingredient_ids):
+        """Рецепты, в которых есть хотя бы один из ингредиентов, в виде
+        пар (id рецепта, доля его ингредиентов из ingredient_ids).
+        Сначала рецепты с большей долей, затем с большим числом
+        совпавших ингредиентов, затем более новые."""
+        self.refresh()
+        matched = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matched.update(self.postings.get(ingredient_id, ()))
+        return [
+            (recipe_id, count / len(self.recipes[recipe_id]))
+            for recipe_id, count in sorted(
+                matched.items(),
+                key=lambda item: (
+                    -item[1] / len(self.recipes[item[0]]),
+                    -item[1],
+                    -item[0]
+                )
+            )
+        ]
+
+
+pantry_index = PantryIndex()
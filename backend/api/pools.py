@@ -0,0 +1,58 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_process_pool(workers):
+    """Пул процессов для тяжёлой работы без обращения к БД:
+    формирования документов и обработки изображений."""
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+@lru_cache(maxsize=None)
+def get_thread_pool(workers):
+    """Пул потоков, ожидающих результатов из пула процессов
+    и сохраняющих их."""
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def save_result(future, save, args):
+    """Дожидается результата из пула процессов и передаёт его в save.
+    Выполняется в служебном потоке, поэтому ошибки не пробрасываются,
+    а пишутся в лог, и соединения с БД закрываются."""
+    try:
+        exception = future.exception()
+        if exception is not None:
+            logger.error(
+                'Не удалось подготовить результат для %s%r',
+                save.__name__,
+                args,
+                exc_info=exception
+            )
+        save(*args, None if exception else future.result())
+    except Exception:
+        logger.exception(
+            'Не удалось сохранить результат в %s%r',
+            save.__name__,
+            args
+        )
+    finally:
+        connections.close_all()
+
+
+def run_in_pools(workers, render, render_args, save, save_args):
+    """Выполняет render(*render_args) в пуле процессов, затем
+    save(*save_args, результат) в пуле потоков. render не должна
+    обращаться к БД, её аргументы и результат передаются между
+    процессами. Если render завершилась ошибкой, save получает None.
+    При workers = 0 обе функции выполняются в текущем потоке."""
+    if not workers:
+        save(*save_args, render(*render_args))
+        return
+    future = get_process_pool(workers).submit(render, *render_args)
+    get_thread_pool(workers).submit(save_result, future, save, save_args)
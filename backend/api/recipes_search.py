@@ -0,0 +1,133 @@
+import math
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector
+)
+from django.db import connection
+from django.db.models import (
+    Case,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    TextField,
+    Value,
+    When
+)
+
+from api.indexes import VersionedIndex
+from recipes.models import Recipe, RecipeIngredient
+
+SEARCH_CONFIG = 'russian'
+TOKEN_RE = re.compile(r'\w+')
+NAME_WEIGHT, TEXT_WEIGHT, INGREDIENTS_WEIGHT = 1.0, 0.4, 0.2
+
+
+def uses_postgresql():
+    return connection.vendor == 'postgresql'
+
+
+def get_tokens(text):
+    return TOKEN_RE.findall(text.casefold())
+
+
+class RecipeIndex(VersionedIndex):
+    """Инвертированный индекс рецептов в памяти процесса.
+    Используется вместо полнотекстового поиска PostgreSQL, например
+    при запуске тестов на SQLite. Слова названия, описания и ингредиентов
+    учитываются с весами как A, B и C в PostgreSQL."""
+    version_key = 'recipes_index_version'
+
+    def __init__(self):
+        super().__init__()
+        self.postings = {}
+        self.count = 0
+
+    def build(self):
+        postings = defaultdict(lambda: defaultdict(float))
+        recipes = Recipe.objects.values_list('id', 'name', 'text')
+        for id, name, text in recipes:
+            for token in get_tokens(name):
+                postings[token][id] += NAME_WEIGHT
+            for token in get_tokens(text):
+                postings[token][id] += TEXT_WEIGHT
+        for id, name in RecipeIngredient.objects.values_list(
+            'recipe_id',
+            'ingredient__name'
+        ):
+            for token in get_tokens(name):
+                postings[token][id] += INGREDIENTS_WEIGHT
+        self.postings = {
+            token: dict(recipes) for token, recipes in postings.items()
+        }
+        self.count = len(recipes)
+
+    def search(self, query):
+        """Id рецептов, содержащих все слова запроса, по убыванию
+        релевантности: сумма весов слов, умноженных на их idf."""
+        self.refresh()
+        tokens = set(get_tokens(query))
+        postings = [self.postings.get(token, {}) for token in tokens]
+        if not postings:
+            return []
+        found = set.intersection(*(set(recipes) for recipes in postings))
+        ranks = {
+            id: sum(
+                recipes[id] * math.log(1 + self.count / len(recipes))
+                for recipes in postings
+            )
+            for id in found
+        }
+        return sorted(found, key=lambda id: (-ranks[id], -id))
+
+
+recipes_index = RecipeIndex()
+
+
+def search_recipes(queryset, query):
+    """Рецепты, найденные по названию, описанию и ингредиентам,
+    по убыванию релевантности."""
+    if uses_postgresql():
+        search_query = SearchQuery(query, config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-pub_date')
+    ids = recipes_index.search(query)
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).order_by(Case(
+        *(When(pk=id, then=Value(position))
+          for position, id in enumerate(ids)),
+        output_field=IntegerField()
+    ))
+
+
+def update_search_vectors(recipe_ids):
+    """Пересчитывает поисковые векторы рецептов в PostgreSQL."""
+    ingredients = RecipeIngredient.objects.filter(
+        recipe=OuterRef('pk')
+    ).values('recipe').annotate(
+        names=StringAgg('ingredient__name', delimiter=' ')
+    ).values('names')
+    Recipe.objects.filter(pk__in=recipe_ids).update(search_vector=(
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(ingredients, output_field=TextField()),
+            weight='C',
+            config=SEARCH_CONFIG
+        )
+    ))
+
+
+def recipes_changed(recipe_ids):
+    """Обновляет поисковый индекс после изменения рецептов."""
+    if uses_postgresql():
+        update_search_vectors(recipe_ids)
+    else:
+        recipes_index.invalidate()
@@ -0,0 +1,122 @@
+from django.db import connection, transaction
+from django.dispatch import Signal
+from rest_framework import status
+
+INSERT_SQL = (
+    'INSERT INTO {table} ({user}, {target}) VALUES {values} '
+    'ON CONFLICT DO NOTHING RETURNING {target}'
+)
+DELETE_SQL = (
+    'DELETE FROM {table} WHERE {user} = %s AND {target} IN ({values}) '
+    'RETURNING {target}'
+)
+
+# Отправляется один раз на пакет связей, добавленных или удалённых
+# SQL-запросом, вместо post_save и post_delete для каждой строки.
+relations_changed = Signal(providing_args=['user_id', 'target_ids', 'created'])
+
+
+def get_columns(model, field):
+    return {
+        name: connection.ops.quote_name(
+            model._meta.get_field(model_field).column
+        )
+        for name, model_field in (
+            ('user', 'user'),
+            ('target', field)
+        )
+    }
+
+
+def add_relations(model, user_id, target_ids, field='recipe'):
+    """Добавляет связи пользователя с объектами (избранное, список
+    покупок, подписки) одним INSERT ... ON CONFLICT DO NOTHING.
+    Возвращает id объектов, связей с которыми ещё не было."""
+    if not target_ids:
+        return set()
+    sql = INSERT_SQL.format(
+        table=connection.ops.quote_name(model._meta.db_table),
+        values=', '.join(['(%s, %s)'] * len(target_ids)),
+        **get_columns(model, field)
+    )
+    params = [value for id in target_ids for value in (user_id, id)]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        target_ids = {target_id for (target_id,) in cursor.fetchall()}
+        if target_ids:
+            relations_changed.send(
+                sender=model,
+                user_id=user_id,
+                target_ids=target_ids,
+                created=True
+            )
+    return target_ids
+
+
+def remove_relations(model, user_id, target_ids, field='recipe'):
+    """Удаляет связи пользователя с объектами одним DELETE.
+    Возвращает id объектов, связи с которыми были."""
+    if not target_ids:
+        return set()
+    sql = DELETE_SQL.format(
+        table=connection.ops.quote_name(model._meta.db_table),
+        values=', '.join(['%s'] * len(target_ids)),
+        **get_columns(model, field)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, *target_ids])
+        target_ids = {target_id for (target_id,) in cursor.fetchall()}
+        if target_ids:
+            relations_changed.send(
+                sender=model,
+                user_id=user_id,
+                target_ids=target_ids,
+                created=False
+            )
+    return target_ids
+
+
+def apply_batch(request, ids, model, field, queryset, messages,
+                rejected=None):
+    """Пакетно добавляет (POST) или удаляет (DELETE) связи пользователя
+    с объектами queryset. Существование объектов проверяется одним
+    запросом с IN, запись — одним INSERT или DELETE.
+    messages содержит тексты ошибок по ключам exists, missing и
+    not_found, rejected — id объектов, которые нельзя добавить,
+    с текстами ошибок. Возвращает результат для каждого id."""
+    ids = list(dict.fromkeys(ids))
+    rejected = rejected or {}
+    user_id = request.user.id
+    if request.method == 'POST':
+        found = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+        changed = add_relations(
+            model,
+            user_id,
+            [id for id in ids if id in found and id not in rejected],
+            field
+        )
+        done, error = status.HTTP_201_CREATED, messages['exists']
+    else:
+        changed = remove_relations(model, user_id, ids, field)
+        rest = [id for id in ids if id not in changed]
+        found = changed | set(
+            queryset.filter(pk__in=rest).values_list('pk', flat=True)
+        ) if rest else changed
+        done, error = status.HTTP_204_NO_CONTENT, messages['missing']
+    results = []
+    for id in ids:
+        if id in changed:
+            results.append({'id': id, 'status': done})
+        elif id not in found:
+            results.append({
+                'id': id,
+                'status': status.HTTP_404_NOT_FOUND,
+                'error': messages['not_found']
+            })
+        else:
+            results.append({
+                'id': id,
+                'status': status.HTTP_400_BAD_REQUEST,
+                'error': rejected.get(id, error)
+            })
+    return results
@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics, ttfonts
+from reportlab.pdfgen.canvas import Canvas
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from api.shopping_list import TITLE, get_lines
+
+FONT_NAME = 'Arial'
+FONT_SIZE = 14
+TITLE_X, TITLE_Y = 100, 750
+LINE_X = 80
+LINE_TOP = 700
+LINE_HEIGHT = 25
+PAGE_BOTTOM = 50
+CHUNK_SIZE = 64 * 1024
+MAX_MEMORY_SIZE = 1024 * 1024
+
+pdfmetrics.registerFont(ttfonts.TTFont(
+    FONT_NAME,
+    os.path.join(settings.BASE_DIR, 'data', 'arial.ttf')
+))
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Базовый рендерер списка покупок.
+    Наследники реализуют render_stream, который по строкам
+    get_shopping_list отдаёт документ частями в байтах.
+    Ответы с ошибками отдаются в JSON."""
+
+    def render_stream(self, ingredients):
+        raise NotImplementedError(
+            'Рендерер должен реализовать метод render_stream()'
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = JSONRenderer.media_type
+            return JSONRenderer().render(data)
+        return b''.join(self.render_stream(data))
+
+    def get_content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в pdf с переносом строк и страниц."""
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+
+    def draw(self, ingredients, file):
+        canvas = Canvas(file, pagesize=A4)
+        width = A4[0] - 2 * LINE_X
+        canvas.setFont(FONT_NAME, FONT_SIZE)
+        canvas.drawString(TITLE_X, TITLE_Y, TITLE)
+        height = LINE_TOP
+        for line in get_lines(ingredients):
+            for part in simpleSplit(line, FONT_NAME, FONT_SIZE, width):
+                if height < PAGE_BOTTOM:
+                    canvas.showPage()
+                    canvas.setFont(FONT_NAME, FONT_SIZE)
+                    height = LINE_TOP
+                canvas.drawString(LINE_X, height, part)
+                height -= LINE_HEIGHT
+        canvas.showPage()
+        canvas.save()
+
+    def render_stream(self, ingredients):
+        """Документ пишется во временный файл, который при большом размере
+        сбрасывается на диск, и читается по CHUNK_SIZE байт."""
+        with SpooledTemporaryFile(max_size=MAX_MEMORY_SIZE) as file:
+            self.draw(ingredients, file)
+            file.seek(0)
+            chunk = file.read(CHUNK_SIZE)
+            while chunk:
+                yield chunk
+                chunk = file.read(CHUNK_SIZE)
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок простым текстом, по ингредиенту в строке."""
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def render_stream(self, ingredients):
+        yield f'{TITLE}\n'.encode(self.charset)
+        for line in get_lines(ingredients):
+            yield f'{line}\n'.encode(self.charset)
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в csv: название, количество, единицы измерения."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_stream(self, ingredients):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(('name', 'amount', 'measurement_unit'))
+        for ingredient in ingredients:
+            writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['total_amount'],
+                ingredient['ingredient__measurement_unit']
+            ))
+            yield buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode(self.charset)
+
+
+class JSONShoppingListRenderer(ShoppingListRenderer):
+    """Список покупок в json: массив объектов с полями
+    name, amount, measurement_unit."""
+    media_type = 'application/json'
+    format = 'json'
+
+    def render_stream(self, ingredients):
+        separator = '['
+        for ingredient in ingredients:
+            item = json.dumps({
+                'name': ingredient['ingredient__name'],
+                'amount': ingredient['total_amount'],
+                'measurement_unit': ingredient['ingredient__measurement_unit']
+            }, ensure_ascii=False)
+            yield f'{separator}{item}'.encode(self.charset)
+            separator = ','
+        yield b']' if separator == ',' else b'[]'
+
+
+SHOPPING_LIST_RENDERERS = (
+    PDFShoppingListRenderer,
+    TextShoppingListRenderer,
+    CSVShoppingListRenderer,
+    JSONShoppingListRenderer,
+)
@@ -1,9 +1,13 @@
-import base64
-
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
+from api.images import bound_image, decode_base64, start_renditions
+from api.pantry_index import pantry_index
+from api.renderers import SHOPPING_LIST_RENDERERS
 from api.serializers.users import CustomUserSerializer
+from api.shopping_list import bump_recipe_carts
 from api.validators import validate_amount, validate_cooking_time
 from recipes.models import (
     Favorite,
@@ -11,19 +15,40 @@ from recipes.models import (
     Recipe,
     RecipeIngredient,
     ShoppingCart,
+    ShoppingListExport,
     Tag
 )
 
+MAX_BATCH_SIZE = 100
+
 
 class Base64ImageField(serializers.ImageField):
-    """Кастомное поле кодирования изображения в base64."""
+    """Кастомное поле кодирования изображения в base64.
+    Изображение декодируется частями с проверкой размера и сохраняется
+    в jpeg с ограничением по большей стороне."""
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='img.' + ext)
+            _, imgstr = data.split(';base64,')
+            data = decode_base64(imgstr)
+        elif getattr(data, 'size', 0) > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                'Слишком большой размер изображения'
+            )
+
+        return bound_image(super().to_internal_value(data))
+
 
-        return super().to_internal_value(data)
+class RenditionImageField(serializers.ImageField):
+    """Ссылка на уменьшенную копию картинки рецепта.
+    Пока копия не готова, отдаётся сама картинка."""
+    def __init__(self, rendition, **kwargs):
+        self.rendition = rendition
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, recipe):
+        return super().to_representation(
+            getattr(recipe, self.rendition) or recipe.image
+        )
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -44,19 +69,12 @@ class TagSerializer(serializers.ModelSerializer):
 
 class FavoriteSerializer(serializers.ModelSerializer):
     """Сериализатор добавления/удаления рецепта в избранное."""
+    already_added_message = 'Вы уже добавили этот рецепт в избранное'
+
     class Meta:
         model = Favorite
         fields = ('user', 'recipe')
 
-    def validate(self, data):
-        """Валидация при добавлении рецепта в избранное."""
-        user, recipe = data['user'], data['recipe']
-        if Favorite.objects.filter(user=user, recipe=recipe).exists():
-            raise serializers.ValidationError(
-                {'error': 'Вы уже добавили этот рецепт в избранное'}
-            )
-        return data
-
     def to_representation(self, instance):
         """Возвращает ответ через RecipeInfoSerializer."""
         context = {'request': self.context.get('request')}
@@ -67,8 +85,19 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return serializer.data
 
 
+class IdsSerializer(serializers.Serializer):
+    """Сериализатор списка id для пакетных запросов."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE
+    )
+
+
 class RecipeInfoSerializer(serializers.ModelSerializer):
     """Сериализатор отображения краткой информации о рецепте."""
+    image = RenditionImageField('thumbnail')
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -76,17 +105,23 @@ class RecipeInfoSerializer(serializers.ModelSerializer):
 
 class ShoppingCartSerializer(FavoriteSerializer):
     """Сериализатор добавления/удаления рецепта в список покупок."""
+    already_added_message = 'Вы уже добавили этот рецепт в список покупок'
+
     class Meta(FavoriteSerializer.Meta):
         model = ShoppingCart
 
-    def validate(self, data):
-        """Валидация при добавлении рецепта в список покупок."""
-        user, recipe = data['user'], data['recipe']
-        if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
-            raise serializers.ValidationError(
-                {'error': 'Вы уже добавили этот рецепт в список покупок'}
-            )
-        return data
+
+class ShoppingListExportSerializer(serializers.ModelSerializer):
+    """Сериализатор выгрузки списка покупок в фоновом режиме."""
+    format = serializers.ChoiceField(
+        choices=[renderer.format for renderer in SHOPPING_LIST_RENDERERS],
+        default=SHOPPING_LIST_RENDERERS[0].format
+    )
+
+    class Meta:
+        model = ShoppingListExport
+        fields = ('id', 'format', 'status', 'created')
+        read_only_fields = ('status', 'created')
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
@@ -109,12 +144,21 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+def get_objects(queryset, ids, message):
+    """Объекты queryset по списку id одним запросом с IN.
+    Все отсутствующие id перечисляются в одной ошибке."""
+    objects = queryset.in_bulk(set(ids))
+    missing = [str(id) for id in dict.fromkeys(ids) if id not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            message.format(ids=', '.join(missing))
+        )
+    return [objects[id] for id in ids]
+
+
 class AddIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор добавления ингредиента в рецепте."""
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient'
-    )
+    id = serializers.IntegerField(source='ingredient', min_value=1)
     amount = serializers.IntegerField(validators=[validate_amount])
 
     class Meta:
@@ -127,6 +171,10 @@ class RecipeSerializer(serializers.ModelSerializer):
     Валидирует ингредиенты ответ возвращает GetRecipeSerializer."""
     author = CustomUserSerializer(read_only=True)
     image = Base64ImageField()
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
     ingredients = AddIngredientSerializer(many=True)
     cooking_time = serializers.IntegerField(validators=[validate_cooking_time])
 
@@ -143,6 +191,21 @@ class RecipeSerializer(serializers.ModelSerializer):
             'cooking_time'
         )
 
+    def validate_tags(self, tags):
+        """Теги загружаются одним запросом."""
+        return get_objects(Tag.objects, tags, 'Не найдены теги с id: {ids}')
+
+    def validate_ingredients(self, ingredients):
+        """Ингредиенты загружаются одним запросом."""
+        found = get_objects(
+            Ingredient.objects,
+            [item['ingredient'] for item in ingredients],
+            'Не найдены ингредиенты с id: {ids}'
+        )
+        for item, ingredient in zip(ingredients, found):
+            item['ingredient'] = ingredient
+        return ingredients
+
     def validate(self, data):
         """Валидация при добавлении ингредиентов в рецепт."""
         ingredients = [item['ingredient'] for item in data['ingredients']]
@@ -157,16 +220,55 @@ class RecipeSerializer(serializers.ModelSerializer):
             )
         return data
 
-    def add_ingredients(self, recipe, ingredients):
-        """Добавление ингредиентов рецепта."""
-        RecipeIngredient.objects.bulk_create(
+    def set_ingredients(self, recipe, ingredients, created=False):
+        """Приводит ингредиенты рецепта к переданным: добавляет новые,
+        меняет количество у изменившихся и удаляет лишние.
+        Изменения выполняются пакетно без сигналов для каждой строки,
+        поэтому списки покупок и индекс «ингредиент → рецепты»
+        обновляются явно один раз на рецепт. Поисковый индекс обновляет
+        сигнал сохранения самого рецепта."""
+        amounts = {
+            item['ingredient'].id: item['amount'] for item in ingredients
+        }
+        existing = {} if created else {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe
+            ).only('id', 'ingredient_id', 'amount')
+        }
+        removed = [
+            recipe_ingredient.id
+            for ingredient_id, recipe_ingredient in existing.items()
+            if ingredient_id not in amounts
+        ]
+        changed = []
+        for ingredient_id, recipe_ingredient in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        added = [
             RecipeIngredient(
                 recipe=recipe,
-                ingredient=ingredient['ingredient'],
-                amount=ingredient['amount']
-            ) for ingredient in ingredients
-        )
-
+                ingredient_id=ingredient_id,
+                amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing
+        ]
+        if removed:
+            queryset = RecipeIngredient.objects.filter(pk__in=removed)
+            queryset._raw_delete(queryset.db)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        if removed or changed or added:
+            transaction.on_commit(lambda: bump_recipe_carts([recipe.id]))
+        if removed or added:
+            transaction.on_commit(lambda: pantry_index.changed([recipe.id]))
+
+    @transaction.atomic
     def create(self, validated_data):
         """"Сохранение ингредиентов и тегов рецепта."""
         user = self.context.get('request').user
@@ -174,26 +276,40 @@ class RecipeSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(author=user, **validated_data)
         recipe.tags.set(tags)
-        self.add_ingredients(recipe, ingredients)
+        self.set_ingredients(recipe, ingredients, created=True)
+        transaction.on_commit(lambda: start_renditions(recipe))
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """"Сохранение ингредиентов и тегов рецепта."""
+        """"Сохранение ингредиентов и тегов рецепта.
+        Теги и ингредиенты меняются только там, где отличаются."""
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
 
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-
         instance.tags.set(tags)
-        self.add_ingredients(instance, ingredients)
+        self.set_ingredients(instance, ingredients)
+        if 'image' in validated_data:
+            validated_data.update(thumbnail='', card='')
+            transaction.on_commit(lambda: start_renditions(instance))
 
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
-        """Возвращает ответ через GetRecipeSerializer."""
-        context = {'request': self.context.get('request')}
-        return GetRecipeSerializer(instance, context=context).data
+        """Возвращает ответ через GetRecipeSerializer.
+        Контекст общий, чтобы подписки запрашивались один раз на страницу.
+        Ингредиенты с названиями загружаются одним запросом."""
+        if 'recipe_ingredient' not in getattr(
+            instance,
+            '_prefetched_objects_cache',
+            {}
+        ):
+            prefetch_related_objects([instance], Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ))
+        return GetRecipeSerializer(instance, context=self.context).data
 
 
 class GetRecipeSerializer(serializers.ModelSerializer):
@@ -207,6 +323,7 @@ class GetRecipeSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField(read_only=True)
     is_in_shopping_cart = serializers.SerializerMethodField(read_only=True)
+    image = RenditionImageField('card')
 
     class Meta:
         model = Recipe
@@ -224,15 +341,30 @@ class GetRecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, object):
-        """Проверка добавлен ли рецепт в избранное."""
+        """Проверка добавлен ли рецепт в избранное.
+        Использует аннотацию из RecipeViewSet.get_queryset, если она есть."""
+        if hasattr(object, 'is_favorited'):
+            return object.is_favorited
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
         return object.favorite.filter(user=request.user).exists()
 
     def get_is_in_shopping_cart(self, object):
-        """Проверка добавлен ли рецепт в список покупок(корзина)."""
+        """Проверка добавлен ли рецепт в список покупок(корзина).
+        Использует аннотацию из RecipeViewSet.get_queryset, если она есть."""
+        if hasattr(object, 'is_in_shopping_cart'):
+            return object.is_in_shopping_cart
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
         return object.shopping_cart.filter(user=request.user).exists()
+
+
+class PantryRecipeSerializer(GetRecipeSerializer):
+    """Сериализатор рецепта с долей ингредиентов, которые есть у
+    пользователя."""
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(GetRecipeSerializer.Meta):
+        fields = GetRecipeSerializer.Meta.fields + ('coverage',)
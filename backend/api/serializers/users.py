@@ -19,15 +19,27 @@ class CustomUserSerializer(UserSerializer):
             'is_subscribed'
         )
 
+    def get_following(self, user):
+        """Множество id авторов, на которых подписан пользователь.
+        Запрашивается один раз и хранится в общем контексте сериализаторов,
+        поэтому вложенные сериализаторы авторов используют один запрос."""
+        following = self.context.get('following')
+        if following is None:
+            following = set(
+                Follow.objects.filter(user=user).values_list(
+                    'author_id',
+                    flat=True
+                )
+            )
+            self.context['following'] = following
+        return following
+
     def get_is_subscribed(self, object):
         """Проверка подписан ли пользователь на автора."""
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
-        return Follow.objects.filter(
-            user=request.user,
-            author=object.id
-        ).exists()
+        return object.id in self.get_following(request.user)
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -57,7 +69,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 class FollowSerializer(CustomUserSerializer):
     """Сериализатор добавления/удаления подписки, просмотра подписок."""
     recipes = serializers.SerializerMethodField(read_only=True)
-    recipes_count = serializers.SerializerMethodField(read_only=True)
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(CustomUserSerializer.Meta):
         fields = CustomUserSerializer.Meta.fields + (
@@ -76,7 +88,3 @@ class FollowSerializer(CustomUserSerializer):
         if recipes_limit:
             queryset = queryset[:int(recipes_limit)]
         return RecipeInfoSerializer(queryset, context=context, many=True).data
-
-    def get_recipes_count(self, obj):
-        """Получить количество рецептов."""
-        return obj.recipes.count()
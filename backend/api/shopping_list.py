@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.db.models import Sum
+
+from api.versions import bump_versions, get_version
+from recipes.models import RecipeIngredient, ShoppingCart
+
+TITLE = 'Список покупок'
+CART_VERSION_KEY = 'shopping_cart_version:{user_id}'
+DOCUMENT_KEY = 'shopping_list:{user_id}:{version}:{format}'
+CACHE_TIMEOUT = 60 * 60
+MAX_CACHED_SIZE = 256 * 1024
+
+
+def get_shopping_list(user):
+    """Суммирует ингредиенты рецептов из списка покупок пользователя."""
+    return RecipeIngredient.objects.filter(
+        recipe__shopping_cart__user=user
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    ).annotate(
+        total_amount=Sum('amount')
+    ).order_by('ingredient__name', 'ingredient__measurement_unit')
+
+
+def get_lines(ingredients):
+    """Строки списка покупок в виде '1. Название – 10 г'."""
+    for number, ingredient in enumerate(ingredients, start=1):
+        yield (
+            f"{number}. {ingredient['ingredient__name']} – "
+            f"{ingredient['total_amount']} "
+            f"{ingredient['ingredient__measurement_unit']}"
+        )
+
+
+def get_cart_version(user_id):
+    """Версия списка покупок пользователя.
+    Меняется при любом изменении содержимого корзины."""
+    return get_version(CART_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_cart_version(*user_ids):
+    """Сбрасывает версии списков покупок пользователей."""
+    bump_versions(
+        [CART_VERSION_KEY.format(user_id=user_id) for user_id in user_ids]
+    )
+
+
+def bump_recipe_carts(recipe_ids):
+    """Сбрасывает версии списков покупок, в которых есть рецепты."""
+    bump_cart_version(*ShoppingCart.objects.filter(
+        recipe__in=recipe_ids
+    ).values_list('user_id', flat=True).distinct())
+
+
+def get_cached_document(user_id, version, format):
+    """Готовый документ со списком покупок из кэша."""
+    return cache.get(
+        DOCUMENT_KEY.format(user_id=user_id, version=version, format=format)
+    )
+
+
+def cache_stream(stream, user_id, version, format):
+    """Отдаёт части документа и сохраняет его в кэш после отправки.
+    Документы больше MAX_CACHED_SIZE не кэшируются."""
+    chunks, size = [], 0
+    for chunk in stream:
+        yield chunk
+        size += len(chunk)
+        if size <= MAX_CACHED_SIZE:
+            chunks.append(chunk)
+    if size <= MAX_CACHED_SIZE:
+        cache.set(
+            DOCUMENT_KEY.format(
+                user_id=user_id,
+                version=version,
+                format=format
+            ),
+            b''.join(chunks),
+            CACHE_TIMEOUT
+        )
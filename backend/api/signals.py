@@ -0,0 +1,181 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.conditional import bump_content_version, bump_user_versions
+from api.counters import change_counter
+from api.filters import TAG_IDS_KEY
+from api.ingredients_index import ingredients_index
+from api.paginations import bump_counts_version
+from api.pantry_index import pantry_index
+from api.recipes_search import recipes_changed
+from api.relations import relations_changed
+from api.shopping_list import bump_cart_version, bump_recipe_carts
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag
+)
+from users.models import Follow, User
+
+LOGIN_FIELDS = frozenset(('last_login',))
+
+
+def is_login(sender, update_fields=None, **kwargs):
+    """Сохранение пользователя при входе, меняющее только last_login.
+    Оно не влияет ни на списки, ни на ответы с рецептами."""
+    return sender is User and update_fields == LOGIN_FIELDS
+
+
+@receiver((post_save, post_delete), sender=ShoppingCart)
+def shopping_cart_changed(sender, instance, **kwargs):
+    """Сбрасывает версию списка покупок владельца корзины."""
+    transaction.on_commit(lambda: bump_cart_version(instance.user_id))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    """Сбрасывает версии списков покупок с изменённым рецептом."""
+    transaction.on_commit(lambda: bump_recipe_carts([instance.recipe_id]))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    """Сбрасывает версии списков покупок с изменённым ингредиентом."""
+    if not created:
+        transaction.on_commit(lambda: bump_recipe_carts(Recipe.objects.filter(
+            recipe_ingredient__ingredient=instance
+        ).values('id')))
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredients_changed(sender, **kwargs):
+    """Помечает индекс поиска ингредиентов устаревшим."""
+    transaction.on_commit(ingredients_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def recipe_search_changed(sender, instance, **kwargs):
+    """Обновляет поисковый индекс изменённого рецепта."""
+    transaction.on_commit(lambda: recipes_changed([instance.id]))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_search_changed(sender, instance, **kwargs):
+    """Обновляет поисковый индекс рецепта с изменённым ингредиентом."""
+    transaction.on_commit(lambda: recipes_changed([instance.recipe_id]))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_search_changed(sender, instance, created, **kwargs):
+    """Обновляет поисковый индекс рецептов с переименованным ингредиентом."""
+    if not created:
+        transaction.on_commit(lambda: recipes_changed(list(
+            Recipe.objects.filter(
+                recipe_ingredient__ingredient=instance
+            ).values_list('id', flat=True)
+        )))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def pantry_changed(sender, instance, **kwargs):
+    """Обновляет в индексе «ингредиент → рецепты» изменённый рецепт."""
+    transaction.on_commit(lambda: pantry_index.changed([instance.recipe_id]))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=User)
+@receiver((post_save, post_delete), sender=Follow)
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def counts_changed(sender, **kwargs):
+    """Сбрасывает закэшированные количества объектов в списках."""
+    if is_login(sender, **kwargs):
+        return
+    transaction.on_commit(bump_counts_version)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tags_changed(sender, **kwargs):
+    """Сбрасывает закэшированный словарь «слаг тега → id»."""
+    transaction.on_commit(lambda: cache.delete(TAG_IDS_KEY))
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    """Увеличивает счётчик избранного у рецепта."""
+    if created:
+        change_counter(Recipe, [instance.recipe_id], 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    """Уменьшает счётчик избранного у рецепта."""
+    change_counter(Recipe, [instance.recipe_id], 'favorites_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    """Увеличивает счётчик рецептов у автора."""
+    if created:
+        change_counter(User, [instance.author_id], 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Уменьшает счётчик рецептов у автора."""
+    change_counter(User, [instance.author_id], 'recipes_count', -1)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=User)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipes_content_changed(sender, **kwargs):
+    """Меняет ETag и Last-Modified ответов со всеми рецептами."""
+    if is_login(sender, **kwargs):
+        return
+    transaction.on_commit(bump_content_version)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Follow)
+def user_lists_changed(sender, instance, **kwargs):
+    """Меняет ETag и Last-Modified ответов с рецептами для пользователя,
+    изменившего избранное, список покупок или подписки."""
+    transaction.on_commit(lambda: bump_user_versions(instance.user_id))
+
+
+@receiver(relations_changed, sender=Favorite)
+def favorites_batch_changed(sender, target_ids, created, **kwargs):
+    """Меняет счётчики избранного у пакета рецептов одним UPDATE."""
+    change_counter(
+        Recipe,
+        target_ids,
+        'favorites_count',
+        1 if created else -1
+    )
+
+
+@receiver(relations_changed, sender=ShoppingCart)
+def shopping_cart_batch_changed(sender, user_id, **kwargs):
+    """Сбрасывает версию списка покупок один раз на пакет рецептов."""
+    transaction.on_commit(lambda: bump_cart_version(user_id))
+
+
+@receiver(relations_changed, sender=Favorite)
+@receiver(relations_changed, sender=ShoppingCart)
+@receiver(relations_changed, sender=Follow)
+def relations_batch_changed(sender, user_id, **kwargs):
+    """Сбрасывает закэшированные количества, ETag и Last-Modified
+    пользователя один раз на пакет связей."""
+    transaction.on_commit(bump_counts_version)
+    transaction.on_commit(lambda: bump_user_versions(user_id))
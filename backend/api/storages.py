@@ -0,0 +1,40 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """Хранилище с адресацией по содержимому.
+    Файл называется по sha256 содержимого и лежит в подкаталоге из двух
+    первых символов хэша. Если такой файл уже есть, повторно он не
+    записывается, поэтому одинаковые картинки хранятся один раз, а файл
+    по имени никогда не меняется и может кэшироваться бессрочно.
+    У уже существующего файла при сохранении обновляется время изменения,
+    чтобы delete_unused_images не удалил его до сохранения рецепта."""
+
+    def get_hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hash = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        _, ext = posixpath.splitext(filename)
+        return posixpath.join(directory, hash[:2], f'{hash}{ext.lower()}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+
+hashed_storage = HashedFileSystemStorage()
@@ -0,0 +1,97 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+RECIPES_COUNT = 60
+RECIPE_INGREDIENTS_COUNT = 3
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@foodgram.ru',
+        password='password',
+        first_name=username,
+        last_name=username
+    )
+
+
+def run_on_commit():
+    """Выполняет колбэки transaction.on_commit сразу:
+    TestCase не фиксирует транзакции, и колбэки не вызываются."""
+    return mock.patch('django.db.transaction.on_commit', lambda func: func())
+
+
+def create_recipes(authors, tags, ingredients, count):
+    """Рецепты по кругу от authors с одним-тремя тегами
+    и RECIPE_INGREDIENTS_COUNT ингредиентами."""
+    recipes = []
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            author=authors[number % len(authors)],
+            name=f'Рецепт {number}',
+            image='recipes/image.jpg',
+            text='Описание',
+            cooking_time=10
+        )
+        recipe.tags.set(tags[:1 + number % len(tags)])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[(number + shift) % len(ingredients)],
+                amount=shift + 1
+            )
+            for shift in range(RECIPE_INGREDIENTS_COUNT)
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_WORKERS=0)
+class RecipesTestCase(TestCase):
+    """Рецепты нескольких авторов с тегами и ингредиентами.
+    Кэш очищается перед каждым тестом, потому что в нём хранятся
+    версии и количества, от которых зависит число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [create_user(f'author{number}') for number in range(3)]
+        cls.user = create_user('user')
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}',
+                color=f'#00000{number}',
+                slug=f'tag{number}'
+            )
+            for number in range(3)
+        ]
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(10)
+        )
+        cls.ingredients = list(Ingredient.objects.order_by('id'))
+        cls.recipes = create_recipes(
+            cls.authors,
+            cls.tags,
+            cls.ingredients,
+            RECIPES_COUNT
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = APIClient()
+        self.user_client = APIClient()
+        self.user_client.force_authenticate(self.user)
@@ -0,0 +1,67 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.tests.base import RecipesTestCase, run_on_commit
+
+
+class ConditionalGetTest(RecipesTestCase):
+    """Ответы со списком и рецептом получают ETag и Last-Modified
+    и отвечают 304, пока рецепты и данные пользователя не менялись."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        self.list_url = reverse('recipe-list')
+        self.detail_url = reverse('recipe-detail', args=(self.recipe.id,))
+
+    def get_etag(self, url):
+        response = self.user_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_not_modified(self):
+        for url in (self.list_url, self.detail_url):
+            with self.subTest(url):
+                etag = self.get_etag(url)
+                response = self.user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertFalse(response.content)
+
+    def test_favorite_changes_etag(self):
+        etags = [self.get_etag(self.list_url), self.get_etag(self.detail_url)]
+        with run_on_commit():
+            response = self.user_client.post(
+                reverse('recipe-favorite', args=(self.recipe.id,))
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(self.get_etag(self.list_url), etags[0])
+        self.assertNotEqual(self.get_etag(self.detail_url), etags[1])
+
+    def test_recipe_edit_changes_etag(self):
+        etags = [self.get_etag(self.list_url), self.get_etag(self.detail_url)]
+        author_client = APIClient()
+        author_client.force_authenticate(self.recipe.author)
+        with run_on_commit():
+            response = author_client.patch(self.detail_url, {
+                'name': 'Новое название',
+                'text': self.recipe.text,
+                'cooking_time': self.recipe.cooking_time,
+                'tags': [tag.id for tag in self.recipe.tags.all()],
+                'ingredients': [
+                    {'id': item.ingredient_id, 'amount': item.amount}
+                    for item in self.recipe.recipe_ingredient.all()
+                ]
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.get_etag(self.list_url), etags[0])
+        self.assertNotEqual(self.get_etag(self.detail_url), etags[1])
+
+    def test_tag_change_changes_etag(self):
+        etags = [self.get_etag(self.list_url), self.get_etag(self.detail_url)]
+        tag = self.tags[0]
+        tag.name = 'Новый тег'
+        with run_on_commit():
+            tag.save()
+        self.assertNotEqual(self.get_etag(self.list_url), etags[0])
+        self.assertNotEqual(self.get_etag(self.detail_url), etags[1])
@@ -0,0 +1,71 @@
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from api.tests.base import RecipesTestCase
+from recipes.models import ShoppingCart, ShoppingListExport
+
+
+@override_settings(SHOPPING_LIST_EXPORT_WORKERS=0)
+class ShoppingListExportTest(RecipesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[0])
+
+    def create_export(self):
+        response = self.user_client.post(
+            reverse('shopping_cart_exports-list'),
+            {'format': 'txt'}
+        )
+        self.assertEqual(response.status_code, 201)
+        return ShoppingListExport.objects.get(pk=response.data['id'])
+
+    def test_export_ready(self):
+        export = self.create_export()
+        self.assertEqual(export.status, ShoppingListExport.READY)
+        self.assertTrue(default_storage.exists(export.file.name))
+
+    def test_storage_error_marks_export_failed(self):
+        with mock.patch.object(
+            default_storage,
+            'save',
+            side_effect=OSError
+        ), self.assertLogs('api.exports'):
+            export = self.create_export()
+        self.assertEqual(export.status, ShoppingListExport.FAILED)
+
+    def test_delete_old_exports(self):
+        old, fresh = self.create_export(), self.create_export()
+        ShoppingListExport.objects.filter(pk=old.pk).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        orphan = default_storage.save(
+            'shopping_lists/orphan.txt',
+            ContentFile(b'')
+        )
+        created = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(default_storage.path(orphan), (created, created))
+        call_command(
+            'delete_old_exports',
+            max_age=timedelta(days=1).total_seconds(),
+            stdout=StringIO()
+        )
+        self.assertFalse(ShoppingListExport.objects.filter(
+            pk=old.pk
+        ).exists())
+        self.assertFalse(default_storage.exists(old.file.name))
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(ShoppingListExport.objects.filter(
+            pk=fresh.pk
+        ).exists())
+        self.assertTrue(default_storage.exists(fresh.file.name))
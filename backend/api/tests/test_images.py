@@ -0,0 +1,63 @@
+import base64
+import io
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from api.serializers.recipes import Base64ImageField
+from api.storages import HashedFileSystemStorage
+from api.tests.base import MEDIA_ROOT
+
+
+def get_base64_png(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'white').save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode('ascii')
+    )
+
+
+@override_settings(IMAGE_UPLOAD_MAX_PIXELS=100 * 100)
+class Base64ImageFieldTest(SimpleTestCase):
+
+    def test_image_within_pixel_limit(self):
+        file = Base64ImageField().to_internal_value(get_base64_png(100, 100))
+        with Image.open(file) as image:
+            self.assertEqual(image.format, 'JPEG')
+
+    def test_image_over_pixel_limit_not_decoded(self):
+        data = get_base64_png(101, 100)
+        with self.assertRaises(ValidationError), mock.patch(
+            'PIL.ImageFile.ImageFile.load'
+        ) as load:
+            Base64ImageField().to_internal_value(data)
+        load.assert_not_called()
+
+
+class HashedFileSystemStorageTest(SimpleTestCase):
+
+    def setUp(self):
+        self.storage = HashedFileSystemStorage(location=MEDIA_ROOT)
+
+    def test_same_content_saved_once(self):
+        first = self.storage.save('recipes/a.png', ContentFile(b'image'))
+        second = self.storage.save('recipes/b.png', ContentFile(b'image'))
+        self.assertEqual(first, second)
+        self.addCleanup(self.storage.delete, first)
+
+    def test_existing_file_touched_on_save(self):
+        name = self.storage.save('recipes/a.png', ContentFile(b'touched'))
+        self.addCleanup(self.storage.delete, name)
+        os.utime(self.storage.path(name), (0, 0))
+        self.storage.save('recipes/b.png', ContentFile(b'touched'))
+        self.assertGreater(
+            self.storage.get_modified_time(name),
+            timezone.now() - timedelta(minutes=1)
+        )
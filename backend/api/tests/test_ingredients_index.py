@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.ingredients_index import ingredients_index
+from api.tests.base import run_on_commit
+from recipes.models import Ingredient
+
+NAMES = (
+    'Кисломолочный сыр',
+    'Молоко',
+    'Сгущённое молоко',
+    'Сахар',
+)
+
+
+class IngredientSearchTest(TestCase):
+    """Поиск ингредиентов по индексу в памяти: сначала совпадения
+    по началу названия, затем по началу слова, затем по подстроке,
+    затем похожие названия."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г') for name in NAMES
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, name):
+        response = self.client.get(reverse('ingredient-list'), {'name': name})
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.data]
+
+    def test_tiers_order(self):
+        self.assertEqual(self.search('Мол'), [
+            'Молоко',
+            'Сгущённое молоко',
+            'Кисломолочный сыр'
+        ])
+
+    def test_typo(self):
+        self.assertEqual(self.search('малоко')[0], 'Молоко')
+
+    @override_settings(INGREDIENT_SEARCH_LIMIT=2)
+    def test_limit(self):
+        self.assertEqual(self.search('мол'), ['Молоко', 'Сгущённое молоко'])
+
+    def test_rebuilt_after_write(self):
+        self.search('мол')
+        with run_on_commit():
+            Ingredient.objects.create(name='Молочай', measurement_unit='г')
+        self.assertEqual(self.search('молоч')[:2], [
+            'Молочай',
+            'Кисломолочный сыр'
+        ])
+
+    def test_changed_rebuilds_index(self):
+        self.search('мол')
+        ingredient = Ingredient.objects.create(
+            name='Молочай',
+            measurement_unit='г'
+        )
+        ingredients_index.changed([ingredient.id])
+        self.assertEqual(self.search('молоча')[0], 'Молочай')
@@ -0,0 +1,90 @@
+import base64
+import json
+
+from django.urls import reverse
+
+from api.tests.base import RECIPES_COUNT, RecipesTestCase
+from recipes.models import Recipe
+
+PAGE_SIZE = 25
+
+
+def encode_cursor(cursor):
+    return base64.b64encode(json.dumps(cursor).encode()).decode('ascii')
+
+
+class KeysetPaginationTest(RecipesTestCase):
+    """Курсорная пагинация рецептов по (pub_date, id)."""
+
+    def setUp(self):
+        super().setUp()
+        self.ids = list(Recipe.objects.order_by(
+            '-pub_date',
+            '-id'
+        ).values_list('id', flat=True))
+
+    def get_page(self, url=None, **params):
+        if url is None:
+            response = self.guest_client.get(
+                reverse('recipe-list'),
+                {'cursor': '', 'limit': PAGE_SIZE, **params}
+            )
+        else:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get_ids(self, page):
+        return [recipe['id'] for recipe in page['results']]
+
+    def test_first_page(self):
+        page = self.get_page()
+        self.assertEqual(self.get_ids(page), self.ids[:PAGE_SIZE])
+        self.assertIsNone(page['previous'])
+        self.assertIsNotNone(page['next'])
+        self.assertNotIn('count', page)
+
+    def test_limit(self):
+        page = self.get_page(limit=7)
+        self.assertEqual(self.get_ids(page), self.ids[:7])
+
+    def test_next_pages_cover_all_recipes(self):
+        page, ids = self.get_page(), []
+        while True:
+            ids += self.get_ids(page)
+            if page['next'] is None:
+                break
+            page = self.get_page(page['next'])
+        self.assertEqual(ids, self.ids)
+        self.assertEqual(len(ids), RECIPES_COUNT)
+
+    def test_previous_returns_to_first_page(self):
+        first = self.get_page()
+        second = self.get_page(first['next'])
+        self.assertEqual(
+            self.get_ids(second),
+            self.ids[PAGE_SIZE:2 * PAGE_SIZE]
+        )
+        previous = self.get_page(second['previous'])
+        self.assertEqual(self.get_ids(previous), self.get_ids(first))
+        self.assertEqual(
+            self.get_ids(self.get_page(previous['next'])),
+            self.get_ids(second)
+        )
+
+    def test_invalid_cursor(self):
+        cursors = {
+            'not base64': 'курсор',
+            'not json': base64.b64encode(b'cursor').decode('ascii'),
+            'no position': encode_cursor({}),
+            'short position': encode_cursor({'p': ['2021-01-01']}),
+            'null position': encode_cursor({'p': [None, None]}),
+            'invalid date': encode_cursor({'p': ['date', 1]}),
+        }
+        for name, cursor in cursors.items():
+            with self.subTest(name):
+                response = self.guest_client.get(
+                    reverse('recipe-list'),
+                    {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 404)
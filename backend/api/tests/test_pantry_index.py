@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.core.cache import cache
+
+from api.pantry_index import PantryIndex
+from api.tests.base import RecipesTestCase
+from recipes.models import RecipeIngredient
+
+
+class PantryIndexTest(RecipesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = PantryIndex()
+        self.index.refresh()
+        self.recipe = self.recipes[0]
+        self.ingredient_ids = list(RecipeIngredient.objects.filter(
+            recipe=self.recipe
+        ).values_list('ingredient_id', flat=True))
+
+    def search(self, ingredient_ids):
+        return dict(self.index.search(ingredient_ids))
+
+    def test_changed_recipe_updated_without_rebuild(self):
+        self.assertEqual(self.search(self.ingredient_ids)[self.recipe.id], 1)
+        RecipeIngredient.objects.filter(
+            recipe=self.recipe,
+            ingredient_id=self.ingredient_ids[0]
+        ).delete()
+        self.index.changed([self.recipe.id])
+        with mock.patch.object(self.index, 'build') as build:
+            found = self.search(self.ingredient_ids[:1])
+        build.assert_not_called()
+        self.assertNotIn(self.recipe.id, found)
+        self.assertEqual(self.search(self.ingredient_ids)[self.recipe.id], 1)
+
+    def test_deleted_recipe_removed(self):
+        self.recipe.delete()
+        self.index.changed([self.recipe.id])
+        self.assertNotIn(self.recipe.id, self.search(self.ingredient_ids))
+
+    def test_missing_changes_rebuild_index(self):
+        self.index.changed([self.recipe.id])
+        cache.delete(self.index.change_key(self.index.change + 1))
+        with mock.patch.object(self.index, 'build') as build:
+            self.index.refresh()
+        build.assert_called_once()
@@ -0,0 +1,37 @@
+from concurrent.futures import Future
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.pools import save_result
+
+
+def get_future(result=None, exception=None):
+    future = Future()
+    if exception is None:
+        future.set_result(result)
+    else:
+        future.set_exception(exception)
+    return future
+
+
+class SaveResultTest(SimpleTestCase):
+    """Ошибки фоновых задач пишутся в лог, а не теряются в пуле потоков."""
+
+    def test_result_saved(self):
+        save = mock.Mock(__name__='save')
+        save_result(get_future(b'result'), save, (1,))
+        save.assert_called_once_with(1, b'result')
+
+    def test_render_error_logged(self):
+        save = mock.Mock(__name__='save')
+        with self.assertLogs('api.pools', 'ERROR') as logs:
+            save_result(get_future(exception=ValueError('render')), save, (1,))
+        save.assert_called_once_with(1, None)
+        self.assertIn('ValueError: render', logs.output[0])
+
+    def test_save_error_logged(self):
+        save = mock.Mock(__name__='save', side_effect=OSError('storage'))
+        with self.assertLogs('api.pools', 'ERROR') as logs:
+            save_result(get_future(b'result'), save, (1,))
+        self.assertIn('OSError: storage', logs.output[0])
@@ -0,0 +1,217 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.pantry_index import pantry_index
+from api.tests.base import (
+    RECIPES_COUNT,
+    RecipesTestCase,
+    create_user,
+    run_on_commit
+)
+from recipes.models import Favorite, ShoppingCart
+from users.models import Follow
+
+# На PostgreSQL для списка без фильтров число рецептов сначала
+# оценивается по статистике таблицы (CachedCountPagination).
+LIST_QUERIES = 6 if connection.vendor == 'postgresql' else 5
+DETAIL_QUERIES = 4
+USER_QUERIES = 1
+
+
+class RecipeQueriesTest(RecipesTestCase):
+    """Число запросов к БД при получении рецептов не зависит
+    от числа рецептов на странице и связанных с ними объектов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+        for recipe in cls.recipes[::3]:
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def test_list_guest(self):
+        with self.assertNumQueries(LIST_QUERIES):
+            response = self.guest_client.get(reverse('recipe-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(
+            recipe['is_favorited'] for recipe in response.data['results']
+        ))
+
+    def test_list_user(self):
+        with self.assertNumQueries(LIST_QUERIES + USER_QUERIES):
+            response = self.user_client.get(reverse('recipe-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any(
+            recipe['is_favorited'] for recipe in response.data['results']
+        ))
+
+    def test_detail_guest(self):
+        url = reverse('recipe-detail', args=(self.recipes[0].id,))
+        with self.assertNumQueries(DETAIL_QUERIES):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['author']['is_subscribed'])
+
+    def test_detail_user(self):
+        url = reverse('recipe-detail', args=(self.recipes[0].id,))
+        with self.assertNumQueries(DETAIL_QUERIES + USER_QUERIES):
+            response = self.user_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['author']['is_subscribed'])
+        self.assertTrue(response.data['is_favorited'])
+        self.assertTrue(response.data['is_in_shopping_cart'])
+
+    def test_detail_invalid_id(self):
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                reverse('recipe-detail', args=('abc',))
+            )
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_queries_do_not_grow_with_limit(self):
+        for limit in (6, 50):
+            with self.subTest(limit=limit):
+                cache.clear()
+                with self.assertNumQueries(LIST_QUERIES + USER_QUERIES):
+                    response = self.user_client.get(
+                        reverse('recipe-list'),
+                        {'limit': limit}
+                    )
+                self.assertEqual(len(response.data['results']), limit)
+
+
+class RecipeTagsFilterTest(RecipesTestCase):
+    """Фильтр по нескольким тегам не дублирует рецепты
+    и не запрашивает теги, пока их словарь есть в кэше."""
+
+    def get_recipes(self, *slugs):
+        return self.guest_client.get(
+            reverse('recipe-list'),
+            {'tags': slugs, 'limit': RECIPES_COUNT}
+        )
+
+    def test_recipes_with_several_tags_returned_once(self):
+        response = self.get_recipes('tag1', 'tag2')
+        ids = [recipe['id'] for recipe in response.data['results']]
+        expected = [
+            recipe.id for recipe in self.recipes
+            if {'tag1', 'tag2'} & {tag.slug for tag in recipe.tags.all()}
+        ]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), set(expected))
+        self.assertEqual(response.data['count'], len(expected))
+
+    def test_tags_not_queried_when_cached(self):
+        self.get_recipes('tag0')
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_recipes('tag0', 'tag1')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT "recipes_tag"."slug"')
+        ])
+
+
+class RecipeCountTest(RecipesTestCase):
+    """Количество рецептов в списке считается без аннотаций пользователя
+    и кэшируется по фильтрам, а не по пользователю."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in cls.recipes[:5]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+
+    def setUp(self):
+        super().setUp()
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(create_user('other'))
+
+    def get_count_queries(self, client, params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(reverse('recipe-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ]
+
+    def test_count_without_user_annotations(self):
+        _, queries = self.get_count_queries(
+            self.user_client,
+            {'author': self.authors[0].id}
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('EXISTS', queries[0])
+        self.assertNotIn('GROUP BY', queries[0])
+
+    def test_count_shared_between_users_and_pages(self):
+        self.get_count_queries(
+            self.user_client,
+            {'author': self.authors[0].id}
+        )
+        response, queries = self.get_count_queries(
+            self.other_client,
+            {'author': self.authors[0].id, 'page': 2, 'limit': 3}
+        )
+        self.assertEqual(queries, [])
+        self.assertEqual(response.data['count'], RECIPES_COUNT // 3)
+
+    def test_user_filter_count_per_user(self):
+        response, _ = self.get_count_queries(
+            self.user_client,
+            {'is_favorited': 1}
+        )
+        self.assertEqual(response.data['count'], 5)
+        response, queries = self.get_count_queries(
+            self.other_client,
+            {'is_favorited': 1}
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['count'], 0)
+
+
+class RecipeUpdateTest(RecipesTestCase):
+    """Изменение ингредиентов рецепта обновляет списки покупок,
+    поиск и индекс «ингредиент → рецепты» один раз на рецепт."""
+
+    def test_removed_ingredients_refresh_once(self):
+        recipe = self.recipes[0]
+        client = APIClient()
+        client.force_authenticate(recipe.author)
+        with run_on_commit(), mock.patch(
+            'api.serializers.recipes.bump_recipe_carts'
+        ) as bump_carts, mock.patch(
+            'api.signals.bump_recipe_carts'
+        ) as bump_signal_carts, mock.patch(
+            'api.signals.recipes_changed'
+        ) as search_changed, mock.patch.object(
+            pantry_index,
+            'changed'
+        ) as pantry_changed:
+            response = client.patch(
+                reverse('recipe-detail', args=(recipe.id,)),
+                {
+                    'name': recipe.name,
+                    'text': recipe.text,
+                    'cooking_time': recipe.cooking_time,
+                    'tags': [self.tags[0].id],
+                    'ingredients': [
+                        {'id': self.ingredients[0].id, 'amount': 5}
+                    ]
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['ingredients']), 1)
+        bump_carts.assert_called_once_with([recipe.id])
+        bump_signal_carts.assert_not_called()
+        search_changed.assert_called_once_with([recipe.id])
+        pantry_changed.assert_called_once_with([recipe.id])
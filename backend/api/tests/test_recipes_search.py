@@ -0,0 +1,104 @@
+from unittest import mock, skipIf
+
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.recipes_search import recipes_changed
+from api.tests.base import RecipesTestCase, run_on_commit
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+
+class RecipeSearchTest(RecipesTestCase):
+    """Поиск рецептов по названию, описанию и ингредиентам:
+    полнотекстовый в PostgreSQL и по индексу в памяти на SQLite."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        beet = Ingredient.objects.create(name='Свекла', measurement_unit='г')
+        cls.by_name, cls.by_text, cls.by_ingredient = (
+            Recipe.objects.create(
+                author=author,
+                name=name,
+                image='recipes/image.jpg',
+                text=text,
+                cooking_time=10
+            )
+            for author, (name, text) in zip(cls.authors, (
+                ('Свекла тушёная', 'Описание'),
+                ('Суп', 'Свекла и морковь'),
+                ('Салат', 'Описание')
+            ))
+        )
+        RecipeIngredient.objects.create(
+            recipe=cls.by_ingredient,
+            ingredient=beet,
+            amount=100
+        )
+        recipes_changed(list(Recipe.objects.values_list('id', flat=True)))
+
+    def search(self, query, **params):
+        response = self.guest_client.get(
+            reverse('recipe-list'),
+            {'search': query, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_all_words_match(self):
+        self.assertEqual(self.search('свекла морковь'), [self.by_text.id])
+        self.assertEqual(self.search('свекла пирог'), [])
+
+    def test_name_ranked_first(self):
+        ids = self.search('свекла')
+        self.assertEqual(set(ids), {
+            self.by_name.id,
+            self.by_text.id,
+            self.by_ingredient.id
+        })
+        self.assertEqual(ids[0], self.by_name.id)
+
+    def test_edited_recipe_found(self):
+        client = APIClient()
+        client.force_authenticate(self.by_ingredient.author)
+        with run_on_commit():
+            response = client.patch(
+                reverse('recipe-detail', args=(self.by_ingredient.id,)),
+                {
+                    'name': 'Пирог',
+                    'text': 'Описание',
+                    'cooking_time': 10,
+                    'tags': [self.tags[0].id],
+                    'ingredients': [
+                        {'id': self.ingredients[0].id, 'amount': 1}
+                    ]
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search('пирог'), [self.by_ingredient.id])
+        self.assertNotIn(self.by_ingredient.id, self.search('свекла'))
+
+    def test_combined_with_filters(self):
+        self.assertEqual(
+            self.search('свекла', author=self.by_text.author_id),
+            [self.by_text.id]
+        )
+
+
+@skipIf(
+    connection.vendor != 'postgresql',
+    'Без PostgreSQL индекс проверяет RecipeSearchTest'
+)
+class RecipeIndexSearchTest(RecipeSearchTest):
+    """Те же проверки для индекса в памяти при запуске на PostgreSQL."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch(
+            'api.recipes_search.uses_postgresql',
+            return_value=False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
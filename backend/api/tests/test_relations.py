@@ -0,0 +1,144 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.serializers.recipes import MAX_BATCH_SIZE
+from api.tests.base import (
+    MEDIA_ROOT,
+    RECIPE_INGREDIENTS_COUNT,
+    RecipesTestCase,
+    create_recipes,
+    create_user
+)
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+
+THREADS = 8
+IN_MEMORY_SQLITE = (
+    connection.vendor == 'sqlite'
+    and connection.settings_dict['TEST']['NAME'] in (None, '', ':memory:')
+)
+
+
+@skipIf(
+    IN_MEMORY_SQLITE,
+    'SQLite в памяти блокирует таблицы при параллельной записи, '
+    'нужна PostgreSQL или файл базы в DB_TEST_NAME'
+)
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_WORKERS=0)
+class RelationsConcurrencyTest(TransactionTestCase):
+    """Одновременные запросы добавления и удаления рецепта
+    в избранное и список покупок: успешен ровно один."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user('user')
+        self.recipe, = create_recipes(
+            [create_user('author')],
+            [Tag.objects.create(name='Тег', color='#000000', slug='tag')],
+            [
+                Ingredient.objects.create(
+                    name=f'Ингредиент {number}',
+                    measurement_unit='г'
+                )
+                for number in range(RECIPE_INGREDIENTS_COUNT)
+            ],
+            1
+        )
+
+    def request_in_parallel(self, method, url):
+        """Статусы ответов на THREADS одновременных запросов."""
+        barrier = threading.Barrier(THREADS)
+
+        def request():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            barrier.wait()
+            try:
+                return getattr(client, method)(url).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            futures = [pool.submit(request) for _ in range(THREADS)]
+            return sorted(future.result() for future in futures)
+
+    def assert_one_succeeded(self, statuses, status):
+        self.assertEqual(statuses, [status] + [400] * (THREADS - 1))
+
+    def test_favorite(self):
+        url = reverse('recipe-favorite', args=(self.recipe.id,))
+        self.assert_one_succeeded(self.request_in_parallel('post', url), 201)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assert_one_succeeded(self.request_in_parallel('delete', url), 204)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_shopping_cart(self):
+        url = reverse('recipe-shopping-cart', args=(self.recipe.id,))
+        self.assert_one_succeeded(self.request_in_parallel('post', url), 201)
+        self.assertEqual(ShoppingCart.objects.filter(
+            user=self.user,
+            recipe=self.recipe
+        ).count(), 1)
+        self.assert_one_succeeded(self.request_in_parallel('delete', url), 204)
+        self.assertFalse(ShoppingCart.objects.exists())
+
+
+class BatchRelationsTest(RecipesTestCase):
+    """Пакетное добавление и удаление меняет счётчики одним UPDATE."""
+
+    def request_batch(self, method, ids):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.user_client, method)(
+                reverse('recipe-favorite-batch'),
+                {'ids': ids},
+                format='json'
+            )
+        updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "recipes_recipe"')
+        ]
+        return response, updates
+
+    def test_favorite_batch(self):
+        ids = [recipe.id for recipe in self.recipes[:MAX_BATCH_SIZE]]
+        response, updates = self.request_batch('post', ids)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(Recipe.objects.filter(id__in=ids).values_list(
+                'favorites_count',
+                flat=True
+            )),
+            {1}
+        )
+        response, updates = self.request_batch('delete', ids)
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Recipe.objects.filter(favorites_count__gt=0).exists())
+
+
+class RelationToggleTest(RecipesTestCase):
+    """Добавление в избранное и список покупок загружает рецепт
+    одним запросом вместе с миниатюрой для ответа."""
+
+    def test_recipe_loaded_once(self):
+        for name in ('recipe-favorite', 'recipe-shopping-cart'):
+            with self.subTest(name):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.user_client.post(
+                        reverse(name, args=(self.recipes[0].id,))
+                    )
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(len([
+                    query for query in context.captured_queries
+                    if query['sql'].startswith('SELECT')
+                    and 'FROM "recipes_recipe"' in query['sql']
+                ]), 1)
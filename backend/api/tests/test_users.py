@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.conditional import bump_content_version
+from api.paginations import bump_counts_version
+from api.tests.base import RecipesTestCase
+from users.models import Follow
+
+SUBSCRIPTIONS_QUERIES = 4
+
+
+class SubscriptionsTest(RecipesTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def test_recipes_limit(self):
+        response = self.user_client.get(
+            reverse('user-subscriptions'),
+            {'recipes_limit': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        for author in response.data['results']:
+            self.assertEqual(len(author['recipes']), 2)
+
+    def test_recipes_ranked_for_page_authors_only(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.user_client.get(
+                reverse('user-subscriptions'),
+                {'limit': 1, 'recipes_limit': 2}
+            )
+        self.assertEqual(len(context.captured_queries), SUBSCRIPTIONS_QUERIES)
+        author_id = response.data['results'][0]['id']
+        ranked_sql, = [
+            query['sql'] for query in context.captured_queries
+            if 'ROW_NUMBER' in query['sql']
+        ]
+        self.assertRegex(
+            ranked_sql,
+            r'ROW_NUMBER\(\) OVER [^)]*\) AS "recipe_rank" FROM '
+            r'"recipes_recipe" WHERE "recipes_recipe"."author_id" '
+            rf'IN \({author_id}\) ORDER BY'
+        )
+
+
+class LastLoginTest(RecipesTestCase):
+    """Вход пользователя не сбрасывает кэши списков и рецептов."""
+
+    def get_scheduled(self, **kwargs):
+        with mock.patch('api.signals.transaction.on_commit') as on_commit:
+            self.user.save(**kwargs)
+        return {call[0][0] for call in on_commit.call_args_list}
+
+    def test_last_login_save_ignored(self):
+        scheduled = self.get_scheduled(update_fields=('last_login',))
+        self.assertNotIn(bump_counts_version, scheduled)
+        self.assertNotIn(bump_content_version, scheduled)
+
+    def test_profile_save_bumps_versions(self):
+        scheduled = self.get_scheduled()
+        self.assertIn(bump_counts_version, scheduled)
+        self.assertIn(bump_content_version, scheduled)
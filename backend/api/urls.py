@@ -1,7 +1,12 @@
 from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
-from api.views.recipes import IngredientViewSet, RecipeViewSet, TagViewSet
+from api.views.recipes import (
+    IngredientViewSet,
+    RecipeViewSet,
+    ShoppingListExportViewSet,
+    TagViewSet
+)
 from api.views.users import CustomUserViewSet
 
 
@@ -10,6 +15,11 @@ router_v1.register(r'users', CustomUserViewSet)
 router_v1.register(r'ingredients', IngredientViewSet)
 router_v1.register(r'recipes', RecipeViewSet)
 router_v1.register(r'tags', TagViewSet)
+router_v1.register(
+    r'shopping_cart_exports',
+    ShoppingListExportViewSet,
+    basename='shopping_cart_exports'
+)
 
 urlpatterns = [
     path('', include(router_v1.urls)),
@@ -0,0 +1,29 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+def new_token():
+    """Случайная версия."""
+    return uuid4().hex
+
+
+def new_timestamp():
+    """Версия в виде текущего времени, пригодная для Last-Modified."""
+    return timezone.now().timestamp()
+
+
+def get_version(key, new_version=new_token):
+    """Версия из кэша по ключу key.
+    Если её нет, сохраняет в кэш и возвращает новую версию new_version()."""
+    version = new_version()
+    if cache.add(key, version, None):
+        return version
+    return cache.get(key, version)
+
+
+def bump_versions(keys, new_version=new_token):
+    """Заменяет версии по ключам keys одной новой версией."""
+    version = new_version()
+    cache.set_many({key: version for key in keys}, None)
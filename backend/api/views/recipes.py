@@ -1,24 +1,62 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers
+)
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
-from reportlab.pdfbase import pdfmetrics, ttfonts
-from reportlab.pdfgen.canvas import Canvas
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from api.conditional import get_recipes_validators
+from api.exports import RENDERERS, start_export
 from api.filters import IngredientSearch, RecipeFilter
-from api.paginations import LimitPageNumberPagination
+from api.ingredients_index import ingredients_index
+from api.pantry_index import pantry_index
+from api.paginations import CachedCountPagination
 from api.permissions import IsAuthorOrReadOnly
+from api.relations import add_relations, apply_batch, remove_relations
+from api.renderers import SHOPPING_LIST_RENDERERS
 from api.serializers.recipes import (
     FavoriteSerializer,
+    IdsSerializer,
     IngredientSerializer,
+    PantryRecipeSerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
+    ShoppingListExportSerializer,
     TagSerializer
 )
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from api.shopping_list import (
+    cache_stream,
+    get_cached_document,
+    get_cart_version,
+    get_shopping_list
+)
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListExport,
+    Tag
+)
+
+NOT_IN_LIST_MESSAGE = 'Этого рецепта не было в cписке'
+RECIPE_NOT_FOUND_MESSAGE = 'Рецепт не найден'
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -30,6 +68,18 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по началу названия обслуживается индексом в памяти
+        без запросов к БД, выдача ограничена INGREDIENT_SEARCH_LIMIT."""
+        name = request.query_params.get(IngredientSearch.search_param)
+        if not name:
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_serializer(
+            ingredients_index.search(name, settings.INGREDIENT_SEARCH_LIMIT),
+            many=True
+        )
+        return Response(serializer.data)
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """Вьюсет обработки запросов получения тегов."""
@@ -49,33 +99,139 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsAuthorOrReadOnly,)
-    pagination_class = LimitPageNumberPagination
+    pagination_class = CachedCountPagination
+    user_count_params = ('is_favorited', 'is_in_shopping_cart')
 
-    def action_post_delete(self, pk, serializer_class):
+    def conditional_response(self, queryset, respond):
+        """Отвечает 304 на If-None-Match или If-Modified-Since, если
+        рецепты не менялись, иначе формирует ответ и добавляет к нему
+        ETag и Last-Modified."""
+        request = self.request
+        validators = get_recipes_validators(queryset, request.user)
+        if validators is None:
+            return respond()
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is None:
+            response = respond()
+        if response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.filter_queryset(Recipe.objects.all()),
+            lambda: super(RecipeViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            recipes = Recipe.objects.filter(pk=int(kwargs['pk']))
+        except (TypeError, ValueError):
+            raise Http404
+        return self.conditional_response(
+            recipes,
+            lambda: super(RecipeViewSet, self).retrieve(
+                request,
+                *args,
+                **kwargs
+            )
+        )
+
+    def get_queryset(self):
+        """Подгружает связанные объекты рецепта и аннотирует
+        флагами избранного и списка покупок."""
+        queryset = super().get_queryset().select_related(
+            'author'
+        ).prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
         user = self.request.user
-        recipe = get_object_or_404(Recipe, pk=pk)
-        object = serializer_class.Meta.model.objects.filter(
-            user=user,
-            recipe=recipe
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField())
+            )
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user,
+                recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user,
+                recipe=OuterRef('pk')
+            ))
         )
 
+    def action_post_delete(self, pk, serializer_class):
+        """Добавляет рецепт в избранное или список покупок одним INSERT
+        ... ON CONFLICT DO NOTHING или удаляет одним DELETE. Повторный
+        запрос, в том числе одновременный, получает ответ 400."""
+        user = self.request.user
+        model = serializer_class.Meta.model
+
         if self.request.method == 'POST':
+            recipe = get_object_or_404(
+                Recipe.objects.only(
+                    'id',
+                    'name',
+                    'image',
+                    'thumbnail',
+                    'cooking_time'
+                ),
+                pk=pk
+            )
+            if not add_relations(model, user.id, [recipe.id]):
+                return Response(
+                    {'error': [serializer_class.already_added_message]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             serializer = serializer_class(
-                data={'user': user.id, 'recipe': pk},
+                model(user=user, recipe=recipe),
                 context={'request': self.request}
             )
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        if object.exists():
-            object.delete()
+        if remove_relations(model, user.id, [int(pk)]):
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipe, pk=pk)
         return Response(
-            {'error': 'Этого рецепта не было в cписке'},
+            {'error': NOT_IN_LIST_MESSAGE},
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    def batch_post_delete(self, serializer_class):
+        """Добавляет или удаляет несколько рецептов из списка ids."""
+        serializer = IdsSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_batch(
+            self.request,
+            serializer.validated_data['ids'],
+            serializer_class.Meta.model,
+            'recipe',
+            Recipe.objects,
+            {
+                'exists': serializer_class.already_added_message,
+                'missing': NOT_IN_LIST_MESSAGE,
+                'not_found': RECIPE_NOT_FOUND_MESSAGE
+            }
+        )
+        return Response({'results': results})
+
     @action(methods=['POST', 'DELETE'], detail=True)
     def favorite(self, request, pk):
         """Добавляет/удалет рецепт в избранное."""
@@ -86,43 +242,116 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Добавляет/удалет рецепт в список покупок."""
         return self.action_post_delete(pk, ShoppingCartSerializer)
 
+    @action(methods=['POST', 'DELETE'], detail=False, url_path='favorite')
+    def favorite_batch(self, request):
+        """Добавляет/удаляет несколько рецептов в избранное."""
+        return self.batch_post_delete(FavoriteSerializer)
+
+    @action(
+        methods=['POST', 'DELETE'],
+        detail=False,
+        url_path='shopping_cart'
+    )
+    def shopping_cart_batch(self, request):
+        """Добавляет/удаляет несколько рецептов в список покупок."""
+        return self.batch_post_delete(ShoppingCartSerializer)
+
+    @action(detail=False, methods=['get'])
+    def what_to_cook(self, request):
+        """Рецепты по доле ингредиентов, которые есть у пользователя.
+        Ингредиенты передаются параметром ingredients: несколько раз
+        или через запятую."""
+        values = ','.join(request.query_params.getlist('ingredients'))
+        try:
+            ingredient_ids = [int(id) for id in values.split(',') if id]
+        except ValueError:
+            raise ValidationError(
+                {'ingredients': 'Ожидается список id ингредиентов'}
+            )
+        ranked = self.paginate_queryset(pantry_index.search(ingredient_ids))
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _ in ranked]
+        )
+        page = []
+        for recipe_id, coverage in ranked:
+            if recipe_id in recipes:
+                recipes[recipe_id].coverage = coverage
+                page.append(recipes[recipe_id])
+        serializer = PantryRecipeSerializer(
+            page,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=['get'],
-            permission_classes=[IsAuthenticated])
+            permission_classes=[IsAuthenticated],
+            renderer_classes=SHOPPING_LIST_RENDERERS)
     def download_shopping_cart(self, request):
-        """Загружает файл .pdf со списком покупок."""
-        response = HttpResponse(content_type='application/pdf')
+        """Загружает файл со списком покупок.
+        Формат выбирается параметром format или заголовком Accept,
+        по умолчанию pdf. Готовый файл кэшируется до изменения корзины,
+        повторный запрос с совпадающим If-None-Match получает 304
+        без формирования файла."""
+        user = request.user
+        renderer = request.accepted_renderer
+        version = get_cart_version(user.id)
+        etag = f'"{version}-{renderer.format}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
+
+        content_type = renderer.get_content_type()
+        document = get_cached_document(user.id, version, renderer.format)
+        if document is not None:
+            response = HttpResponse(document, content_type=content_type)
+        else:
+            response = StreamingHttpResponse(
+                cache_stream(
+                    renderer.render_stream(get_shopping_list(user).iterator()),
+                    user.id,
+                    version,
+                    renderer.format
+                ),
+                content_type=content_type
+            )
         response['Content-Disposition'] = (
-            "attachment; filename='shopping_cart.pdf'"
-        )
-        canvas = Canvas(response)
-        font_arial = ttfonts.TTFont('Arial', 'data/arial.ttf')
-        pdfmetrics.registerFont(font_arial)
-        canvas.setFont('Arial', 14)
-
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values_list(
-            'ingredient__name',
-            'amount',
-            'ingredient__measurement_unit'
+            f"attachment; filename='shopping_cart.{renderer.format}'"
         )
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
 
-        shopping_list = {}
-        for name, amount, unit in ingredients:
-            if name not in shopping_list:
-                shopping_list[name] = {'amount': amount, 'unit': unit}
-            else:
-                shopping_list[name]['amount'] += amount
-        height = 700
-
-        canvas.drawString(100, 750, 'Список покупок')
-        for number, (name, data) in enumerate(shopping_list.items(), start=1):
-            canvas.drawString(
-                80,
-                height,
-                f"{number}. {name} – {data['amount']} {data['unit']}"
+class ShoppingListExportViewSet(mixins.CreateModelMixin,
+                                mixins.RetrieveModelMixin,
+                                viewsets.GenericViewSet):
+    """Вьюсет фоновой выгрузки списка покупок.
+    Создание выгрузки, проверка её статуса и скачивание готового файла.
+    Для небольших списков остаётся синхронный download_shopping_cart."""
+    serializer_class = ShoppingListExportSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return ShoppingListExport.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        start_export(serializer.save(user=self.request.user))
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk):
+        """Загружает сформированный файл со списком покупок."""
+        export = self.get_object()
+        if export.status != ShoppingListExport.READY:
+            return Response(
+                {'error': 'Файл со списком покупок ещё не готов'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            height -= 25
-        canvas.showPage()
-        canvas.save()
-        return response
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=f'shopping_cart.{export.format}',
+            content_type=RENDERERS[export.format]().get_content_type()
+        )
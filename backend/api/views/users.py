@@ -1,3 +1,12 @@
+from django.db.models import (
+    BooleanField,
+    F,
+    Prefetch,
+    Window,
+    prefetch_related_objects
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -8,10 +17,18 @@ from rest_framework.permissions import (
 )
 from rest_framework.response import Response
 
-from api.paginations import LimitPageNumberPagination
+from api.paginations import CachedCountPagination
+from api.relations import apply_batch
+from api.serializers.recipes import IdsSerializer
 from api.serializers.users import CustomUserSerializer, FollowSerializer
+from recipes.models import Recipe
 from users.models import Follow, User
 
+ALREADY_SUBSCRIBED_MESSAGE = 'Вы уже подписаны'
+SELF_SUBSCRIBE_MESSAGE = 'Невозможно подписаться на себя'
+NOT_SUBSCRIBED_MESSAGE = 'Вы не подписаны на этого пользователя'
+USER_NOT_FOUND_MESSAGE = 'Пользователь не найден'
+
 
 class CustomUserViewSet(UserViewSet):
     """Вьюсет обработки запросов пользователей и подписок.
@@ -19,7 +36,9 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
-    pagination_class = LimitPageNumberPagination
+    pagination_class = CachedCountPagination
+    cursor_ordering = ('id',)
+    user_count_actions = ('subscriptions',)
 
     def get_permissions(self):
         """Проверка и установка разрешений для текущего пользователя."""
@@ -27,15 +46,50 @@ class CustomUserViewSet(UserViewSet):
             self.permission_classes = (IsAuthenticated,)
         return super().get_permissions()
 
+    def get_subscriptions_recipes(self, author_ids):
+        """Рецепты авторов author_ids для предзагрузки.
+        При recipes_limit берутся только первые N рецептов каждого автора
+        с помощью ROW_NUMBER() OVER (PARTITION BY author_id), ранжируются
+        рецепты только авторов текущей страницы."""
+        recipes = Recipe.objects.all()
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if not recipes_limit:
+            return recipes
+        ranked = Recipe.objects.filter(
+            author_id__in=author_ids
+        ).annotate(
+            recipe_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=F('pub_date').desc()
+            )
+        ).values('id', 'recipe_rank')
+        sql, params = ranked.query.sql_with_params()
+        return recipes.annotate(is_top=RawSQL(
+            f'{Recipe._meta.db_table}.id IN (SELECT id FROM ({sql}) AS ranked'
+            ' WHERE recipe_rank <= %s)',
+            (*params, int(recipes_limit)),
+            output_field=BooleanField()
+        )).filter(is_top=True)
+
     @action(
         methods=['GET'],
         detail=False,
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request):
-        """Получает мои подписки."""
-        subscriptions = User.objects.filter(following__user=self.request.user)
+        """Получает мои подписки.
+        Рецепты подгружаются после пагинации только для авторов страницы."""
+        subscriptions = User.objects.filter(
+            following__user=request.user
+        ).order_by('id')
         page = self.paginate_queryset(subscriptions)
+        prefetch_related_objects(page, Prefetch(
+            'recipes',
+            queryset=self.get_subscriptions_recipes(
+                [author.id for author in page]
+            )
+        ))
         serializer = FollowSerializer(
             page,
             many=True,
@@ -53,12 +107,12 @@ class CustomUserViewSet(UserViewSet):
         if request.method == 'POST':
             if subscription.exists():
                 return Response(
-                    {'error': 'Вы уже подписаны'},
+                    {'error': ALREADY_SUBSCRIBED_MESSAGE},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             if user == author:
                 return Response(
-                    {'error': 'Невозможно подписаться на себя'},
+                    {'error': SELF_SUBSCRIBE_MESSAGE},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             serializer = FollowSerializer(author, context={'request': request})
@@ -69,6 +123,31 @@ class CustomUserViewSet(UserViewSet):
             subscription.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(
-            {'error': 'Вы не подписаны на этого пользователя'},
+            {'error': NOT_SUBSCRIBED_MESSAGE},
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(
+        methods=['POST', 'DELETE'],
+        detail=False,
+        url_path='subscribe',
+        permission_classes=[IsAuthenticated]
+    )
+    def subscribe_batch(self, request):
+        """Добавляет/удаляет подписки на нескольких пользователей."""
+        serializer = IdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_batch(
+            request,
+            serializer.validated_data['ids'],
+            Follow,
+            'author',
+            User.objects,
+            {
+                'exists': ALREADY_SUBSCRIBED_MESSAGE,
+                'missing': NOT_SUBSCRIBED_MESSAGE,
+                'not_found': USER_NOT_FOUND_MESSAGE
+            },
+            rejected={request.user.id: SELF_SUBSCRIBE_MESSAGE}
+        )
+        return Response({'results': results})
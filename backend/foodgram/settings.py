@@ -83,10 +83,31 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'TEST': {
+            'NAME': os.getenv('DB_TEST_NAME'),
+        },
     }
 }
 
+# Версии списков покупок, счётчиков, индексов и ETag рецептов хранятся
+# в кэше, поэтому при нескольких воркерах кэш должен быть общим
+# (в infra используется memcached). Кэш в памяти процесса подходит
+# только для разработки и тестов, число записей в нём ограничено.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+if CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=200)),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -143,6 +164,26 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6
 }
 
+SHOPPING_LIST_EXPORT_WORKERS = int(
+    os.getenv('SHOPPING_LIST_EXPORT_WORKERS', default=2)
+)
+
+IMAGE_PROCESSING_WORKERS = int(
+    os.getenv('IMAGE_PROCESSING_WORKERS', default=2)
+)
+
+IMAGE_UPLOAD_MAX_SIZE = int(
+    os.getenv('IMAGE_UPLOAD_MAX_SIZE', default=5 * 1024 * 1024)
+)
+
+IMAGE_UPLOAD_MAX_PIXELS = int(
+    os.getenv('IMAGE_UPLOAD_MAX_PIXELS', default=40 * 1000 * 1000)
+)
+
+INGREDIENT_SEARCH_LIMIT = int(
+    os.getenv('INGREDIENT_SEARCH_LIMIT', default=50)
+)
+
 DJOSER = {
     'HIDE_USERS': False,
     'LOGIN_FIELD': 'email',
@@ -6,6 +6,7 @@ from recipes.models import (
     Recipe,
     RecipeIngredient,
     ShoppingCart,
+    ShoppingListExport,
     Tag
 )
 
@@ -40,7 +41,7 @@ class RecipeAdmin(admin.ModelAdmin):
     display_tags.short_description = 'Теги'
 
     def favorite(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
     favorite.short_description = 'раз добавили этот рецепт в избранное'
 
 
@@ -57,3 +58,9 @@ class FavoriteAdmin(admin.ModelAdmin):
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'user')
+
+
+@admin.register(ShoppingListExport)
+class ShoppingListExportAdmin(admin.ModelAdmin):
+    list_display = ('user', 'format', 'status', 'created')
+    list_filter = ('status', 'format')
@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+REPEAT = 20
+
+
+def measure(function, repeat):
+    """Медианное время вызова function в миллисекундах
+    и число запросов к БД при одном вызове."""
+    with CaptureQueriesContext(connection) as context:
+        function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), len(context.captured_queries)
+
+
+class BenchmarkCommand(BaseCommand):
+    """Команда замеров на временных данных.
+    Наследники реализуют benchmark, всё созданное им откатывается,
+    поэтому команду можно запускать на рабочей базе."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=REPEAT,
+            help='Сколько раз повторять каждый замер'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.benchmark(**options)
+            transaction.set_rollback(True)
+
+    def benchmark(self, **options):
+        raise NotImplementedError(
+            'Команда должна реализовать метод benchmark()'
+        )
+
+    def report(self, name, function, repeat):
+        elapsed, queries = measure(function, repeat)
+        self.stdout.write(f'{name}: {elapsed:.2f} мс, запросов: {queries}')
@@ -0,0 +1,55 @@
+import csv
+import os
+
+from django.conf import settings
+
+from api.ingredients_index import IngredientIndex
+from recipes.management.benchmark import BenchmarkCommand
+from recipes.models import Ingredient
+
+QUERIES = (
+    'м',
+    'мол',
+    'молоко',
+    'сыр',
+    'масло',
+    'картоф',
+    'молако',
+    'картофиль',
+    'соус томатный',
+)
+LIMITS = (10, 50)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Замеряет построение индекса ингредиентов и поиск по нему '
+        'на ингредиентах из data/ingredients.csv.'
+    )
+
+    def benchmark(self, repeat, **options):
+        with open(
+            os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv'),
+            encoding='utf-8'
+        ) as file:
+            Ingredient.objects.bulk_create(
+                (Ingredient(**row) for row in csv.DictReader(file)),
+                ignore_conflicts=True
+            )
+        index = IngredientIndex()
+        self.report(
+            f'построение индекса ({Ingredient.objects.count()} шт.)',
+            index.build,
+            repeat
+        )
+        index.refresh()
+        for limit in LIMITS:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'Не более {limit} результатов'
+            ))
+            for query in QUERIES:
+                self.report(
+                    query,
+                    lambda: index.search(query, limit),
+                    repeat
+                )
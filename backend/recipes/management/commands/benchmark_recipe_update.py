@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers.recipes import RecipeSerializer
+from recipes.management.benchmark import BenchmarkCommand
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+User = get_user_model()
+
+INGREDIENTS_COUNT = 30
+TAGS_COUNT = 3
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Замеряет редактирование рецепта '
+        f'с {INGREDIENTS_COUNT} ингредиентами через RecipeSerializer.'
+    )
+
+    def benchmark(self, repeat, **options):
+        author = User.objects.create_user(
+            username='benchmark',
+            email='benchmark@foodgram.ru',
+            first_name='benchmark',
+            last_name='benchmark'
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'Тег для замеров {number}',
+                color=f'#FFFF0{number}',
+                slug=f'benchmark{number}'
+            )
+            for number in range(TAGS_COUNT)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент для замеров {number}',
+                measurement_unit='г'
+            )
+            for number in range(INGREDIENTS_COUNT + 1)
+        ]
+        recipe = Recipe.objects.create(
+            author=author,
+            name='Рецепт',
+            image='recipes/benchmark.jpg',
+            text='Описание',
+            cooking_time=10
+        )
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients[:INGREDIENTS_COUNT]
+        )
+        request = Request(APIRequestFactory().patch('/'))
+        request.user = author
+        data = {
+            'tags': [tag.id for tag in tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 1}
+                for ingredient in ingredients[:INGREDIENTS_COUNT]
+            ],
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10
+        }
+
+        def edit():
+            serializer = RecipeSerializer(
+                Recipe.objects.get(pk=recipe.id),
+                data=data,
+                partial=True,
+                context={'request': request}
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return serializer.data
+
+        def change_amount():
+            data['ingredients'][0]['amount'] += 1
+            return edit()
+
+        def replace_ingredient():
+            last = data['ingredients'][-1]
+            last['id'] = ingredients[
+                INGREDIENTS_COUNT if last['id'] != ingredients[-1].id
+                else INGREDIENTS_COUNT - 1
+            ].id
+            return edit()
+
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            self.report('без изменений', edit, repeat)
+            self.report('изменено количество', change_amount, repeat)
+            self.report('заменён ингредиент', replace_ingredient, repeat)
@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+
+from api.renderers import SHOPPING_LIST_RENDERERS
+from api.shopping_list import get_shopping_list
+from recipes.management.benchmark import BenchmarkCommand
+from recipes.models import Ingredient, Recipe, RecipeIngredient, ShoppingCart
+
+User = get_user_model()
+
+CART_SIZES = (10, 100, 1000)
+INGREDIENTS_COUNT = 200
+RECIPE_INGREDIENTS_COUNT = 3
+
+
+def create_cart(size, ingredients):
+    """Пользователь со списком покупок из size рецептов."""
+    user = User.objects.create_user(
+        username=f'benchmark{size}',
+        email=f'benchmark{size}@foodgram.ru',
+        first_name='benchmark',
+        last_name='benchmark'
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=user,
+            name=f'Рецепт {number}',
+            image='recipes/benchmark.jpg',
+            text='Описание',
+            cooking_time=10
+        )
+        for number in range(size)
+    )
+    recipes = list(Recipe.objects.filter(author=user))
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient=ingredients[
+                (number * RECIPE_INGREDIENTS_COUNT + shift)
+                % len(ingredients)
+            ],
+            amount=shift + 1
+        )
+        for number, recipe in enumerate(recipes)
+        for shift in range(RECIPE_INGREDIENTS_COUNT)
+    )
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=user, recipe=recipe) for recipe in recipes
+    )
+    return user
+
+
+def get_python_shopping_list(user):
+    """Прежняя сборка списка покупок: все строки рецептов из корзины
+    загружаются из БД и суммируются в словаре по названию."""
+    ingredients = RecipeIngredient.objects.filter(
+        recipe__shopping_cart__user=user
+    ).values_list(
+        'ingredient__name',
+        'amount',
+        'ingredient__measurement_unit'
+    )
+    shopping_list = {}
+    for name, amount, unit in ingredients:
+        if name not in shopping_list:
+            shopping_list[name] = {'amount': amount, 'unit': unit}
+        else:
+            shopping_list[name]['amount'] += amount
+    return shopping_list
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Сравнивает сборку списка покупок в Python и в БД и замеряет '
+        'формирование документов для корзин из '
+        f'{", ".join(map(str, CART_SIZES))} рецептов.'
+    )
+
+    def benchmark(self, repeat, **options):
+        Ingredient.objects.bulk_create(
+            Ingredient(
+                name=f'Ингредиент для замеров {number}',
+                measurement_unit='г' if number % 2 else 'шт'
+            )
+            for number in range(INGREDIENTS_COUNT)
+        )
+        ingredients = list(Ingredient.objects.filter(
+            name__startswith='Ингредиент для замеров'
+        ))
+        for size in CART_SIZES:
+            user = create_cart(size, ingredients)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'Рецептов в корзине: {size}'
+            ))
+            self.report(
+                'сборка списка в Python (прежний способ)',
+                lambda: get_python_shopping_list(user),
+                repeat
+            )
+            self.report(
+                'сборка списка в БД',
+                lambda: list(get_shopping_list(user)),
+                repeat
+            )
+            shopping_list = list(get_shopping_list(user))
+            for renderer in SHOPPING_LIST_RENDERERS:
+                self.report(
+                    renderer.format,
+                    lambda: b''.join(renderer().render_stream(shopping_list)),
+                    repeat
+                )
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from recipes.models import ShoppingListExport
+
+EXPORTS_DIRECTORY = 'shopping_lists'
+MAX_AGE = 24 * 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет выгрузки списков покупок старше --max-age секунд '
+        'вместе с файлами, а также файлы выгрузок без записи в БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=MAX_AGE,
+            help='Удалять выгрузки и файлы старше стольких секунд'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести выгрузки и файлы, которые будут удалены'
+        )
+
+    def handle(self, *args, **options):
+        created_before = timezone.now() - timedelta(
+            seconds=options['max_age']
+        )
+        exports = list(ShoppingListExport.objects.filter(
+            created__lt=created_before
+        ))
+        for export in exports:
+            if not options['dry_run']:
+                export.file.delete(save=False)
+            self.stdout.write(str(export))
+        if not options['dry_run']:
+            ShoppingListExport.objects.filter(
+                pk__in=[export.pk for export in exports]
+            ).delete()
+        used = set(ShoppingListExport.objects.exclude(
+            file=''
+        ).values_list('file', flat=True))
+        if default_storage.exists(EXPORTS_DIRECTORY):
+            _, files = default_storage.listdir(EXPORTS_DIRECTORY)
+            for name in files:
+                name = f'{EXPORTS_DIRECTORY}/{name}'
+                if name in used:
+                    continue
+                if default_storage.get_modified_time(name) > created_before:
+                    continue
+                if not options['dry_run']:
+                    default_storage.delete(name)
+                self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Устаревших выгрузок: {len(exports)}'
+        ))
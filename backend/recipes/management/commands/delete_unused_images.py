@@ -0,0 +1,69 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from api.storages import hashed_storage
+from recipes.models import Recipe
+
+IMAGES_DIRECTORY = 'recipes'
+MIN_AGE = 60 * 60
+
+
+def walk(storage, directory):
+    """Все файлы каталога хранилища и его подкаталогов."""
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from walk(storage, posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки рецептов и их копии, на которые не ссылается '
+        'ни один рецепт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=MIN_AGE,
+            help='Не трогать файлы моложе стольких секунд'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, которые будут удалены'
+        )
+
+    def handle(self, *args, **options):
+        used = {
+            name
+            for names in Recipe.objects.values_list(
+                'image',
+                'thumbnail',
+                'card'
+            )
+            for name in names if name
+        }
+        created_before = timezone.now() - timedelta(
+            seconds=options['min_age']
+        )
+        deleted = 0
+        for name in walk(hashed_storage, IMAGES_DIRECTORY):
+            if name in used:
+                continue
+            if hashed_storage.get_modified_time(name) > created_before:
+                continue
+            if not options['dry_run']:
+                hashed_storage.delete(name)
+            self.stdout.write(name)
+            deleted += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Неиспользуемых файлов: {deleted}'
+        ))
@@ -0,0 +1,72 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from api.shopping_list import get_shopping_list
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow, User
+
+
+def get_hot_queries(user, recipe, author):
+    """Частые запросы по пользователю: фильтры RecipeFilter,
+    проверки action_post_delete и подписки CustomUserViewSet."""
+    return {
+        'is_favorited': Recipe.objects.filter(favorite__user=user),
+        'is_in_shopping_cart': Recipe.objects.filter(
+            shopping_cart__user=user
+        ),
+        'recipe_flags': Recipe.objects.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user,
+                recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user,
+                recipe=OuterRef('pk')
+            ))
+        ),
+        'favorite': Favorite.objects.filter(user=user, recipe=recipe),
+        'shopping_cart': ShoppingCart.objects.filter(
+            user=user,
+            recipe=recipe
+        ),
+        'recipe_carts': ShoppingCart.objects.filter(
+            recipe=recipe
+        ).values('user_id'),
+        'shopping_list': get_shopping_list(user),
+        'subscribe': Follow.objects.filter(user=user, author=author),
+        'following': Follow.objects.filter(user=user).values('author_id'),
+        'subscriptions': User.objects.filter(following__user=user),
+        'subscriptions_recipes': Recipe.objects.filter(
+            author__following__user=user
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Выводит планы выполнения частых запросов по пользователю.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='id пользователя')
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Выполнить запросы (EXPLAIN ANALYZE, только PostgreSQL)'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['user']:
+            users = users.filter(id=options['user'])
+        user = users.first()
+        recipe = Recipe.objects.order_by('id').first()
+        author = User.objects.order_by('-id').first()
+        if user is None or recipe is None:
+            raise CommandError('Нужны хотя бы один пользователь и рецепт')
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options = {'analyze': True, 'buffers': True}
+        for name, queryset in get_hot_queries(user, recipe, author).items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
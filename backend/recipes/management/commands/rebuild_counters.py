@@ -0,0 +1,31 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+def count_subquery(queryset, field):
+    """Подзапрос с количеством строк queryset для объекта по полю field."""
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(count=Count('pk')).values('count'),
+        output_field=IntegerField()
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики избранного у рецептов и рецептов у авторов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Recipe.objects.update(
+                favorites_count=count_subquery(Favorite.objects, 'recipe')
+            )
+            User.objects.update(
+                recipes_count=count_subquery(Recipe.objects, 'author')
+            )
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
@@ -0,0 +1,49 @@
+# Generated by Django 2.2.19 on 2026-10-18 02:28
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_INDEX = (
+    'CREATE INDEX recipes_recipe_search_vector_gin '
+    'ON recipes_recipe USING gin (search_vector)'
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS recipes_recipe_search_vector_gin'
+FILL_SEARCH_VECTOR = """
+UPDATE recipes_recipe SET search_vector =
+    setweight(to_tsvector('russian', name), 'A')
+    || setweight(to_tsvector('russian', text), 'B')
+    || setweight(to_tsvector('russian', coalesce((
+        SELECT string_agg(ingredient.name, ' ')
+        FROM recipes_recipeingredient AS recipe_ingredient
+        JOIN recipes_ingredient AS ingredient
+            ON ingredient.id = recipe_ingredient.ingredient_id
+        WHERE recipe_ingredient.recipe_id = recipes_recipe.id
+    ), '')), 'C')
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+        schema_editor.execute(FILL_SEARCH_VECTOR)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_shoppinglistexport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
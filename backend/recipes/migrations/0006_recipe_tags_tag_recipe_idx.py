@@ -0,0 +1,18 @@
+from django.db import migrations
+
+CREATE_INDEX = (
+    'CREATE INDEX recipe_tags_tag_recipe_idx '
+    'ON recipes_recipe_tags (tag_id, recipe_id)'
+)
+DROP_INDEX = 'DROP INDEX recipe_tags_tag_recipe_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
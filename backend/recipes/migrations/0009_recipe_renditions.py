@@ -0,0 +1,23 @@
+# Generated by Django 2.2.19 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='card',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/cards/', verbose_name='Картинка для карточки'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='recipes/thumbnails/', verbose_name='Миниатюра'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.19 on 2026-10-18 02:41
+
+import api.storages
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='card',
+            field=models.ImageField(blank=True, editable=False, storage=api.storages.HashedFileSystemStorage(), upload_to='recipes/cards/', verbose_name='Картинка для карточки'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=api.storages.HashedFileSystemStorage(), upload_to='recipes/', verbose_name='Картинка'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, storage=api.storages.HashedFileSystemStorage(), upload_to='recipes/thumbnails/', verbose_name='Миниатюра'),
+        ),
+    ]
@@ -1,11 +1,15 @@
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+from api.counters import CountersMixin
+from api.storages import hashed_storage
 from api.validators import validate_amount, validate_cooking_time
 
 MAX_LENGHT = 200
 COUNT_SYMBOL_OBJ = 50
+MAX_LENGHT_FORMAT = 10
 
 User = get_user_model()
 
@@ -65,7 +69,9 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}'
 
 
-class Recipe(models.Model):
+class Recipe(CountersMixin, models.Model):
+    counter_fields = ('favorites_count',)
+
     tags = models.ManyToManyField(
         Tag,
         related_name='recipes',
@@ -89,7 +95,22 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         verbose_name='Картинка',
-        upload_to='recipes/'
+        upload_to='recipes/',
+        storage=hashed_storage
+    )
+    thumbnail = models.ImageField(
+        verbose_name='Миниатюра',
+        upload_to='recipes/thumbnails/',
+        storage=hashed_storage,
+        blank=True,
+        editable=False
+    )
+    card = models.ImageField(
+        verbose_name='Картинка для карточки',
+        upload_to='recipes/cards/',
+        storage=hashed_storage,
+        blank=True,
+        editable=False
     )
     text = models.TextField(
         verbose_name='Описание'
@@ -102,6 +123,20 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
 
     class Meta:
         ordering = ['-pub_date']
@@ -113,6 +148,12 @@ class Recipe(models.Model):
                 name='unique_recipe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.name[:COUNT_SYMBOL_OBJ]}'
@@ -158,13 +199,15 @@ class Favorite(models.Model):
         User,
         on_delete=models.CASCADE,
         verbose_name='Пользователь',
-        related_name='favorite'
+        related_name='favorite',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         verbose_name='Рецепты',
-        related_name='favorite'
+        related_name='favorite',
+        db_index=False
     )
 
     class Meta:
@@ -176,6 +219,12 @@ class Favorite(models.Model):
                 name='unique_favorite'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favorite_recipe_user_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.recipe} в избранном у {self.user}'
@@ -186,13 +235,15 @@ class ShoppingCart(models.Model):
         User,
         on_delete=models.CASCADE,
         verbose_name='Пользователь',
-        related_name='shopping_cart'
+        related_name='shopping_cart',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         verbose_name='Рецепты',
-        related_name='shopping_cart'
+        related_name='shopping_cart',
+        db_index=False
     )
 
     class Meta:
@@ -204,6 +255,57 @@ class ShoppingCart(models.Model):
                 name='unique_shopping cart'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='shopping_cart_recipe_user_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.recipe} в корзине у {self.user}'
+
+
+class ShoppingListExport(models.Model):
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Формируется'),
+        (READY, 'Готов'),
+        (FAILED, 'Ошибка'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь',
+        related_name='shopping_list_exports'
+    )
+    format = models.CharField(
+        max_length=MAX_LENGHT_FORMAT,
+        verbose_name='Формат'
+    )
+    status = models.CharField(
+        max_length=MAX_LENGHT_FORMAT,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    file = models.FileField(
+        upload_to='shopping_lists/',
+        blank=True,
+        verbose_name='Файл'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Выгрузка списка покупок'
+        verbose_name_plural = 'Выгрузки списков покупок'
+
+    def __str__(self):
+        return f'Список покупок {self.user} ({self.format}, {self.status})'
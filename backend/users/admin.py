@@ -6,7 +6,13 @@ from users.models import Follow, User
 
 @register(User)
 class CustomUserAmin(UserAdmin):
-    list_display = ('username', 'email', 'first_name', 'last_name')
+    list_display = (
+        'username',
+        'email',
+        'first_name',
+        'last_name',
+        'recipes_count'
+    )
     list_filter = ('username', 'email')
 
 
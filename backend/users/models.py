@@ -2,11 +2,15 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from rest_framework.exceptions import ValidationError
 
+from api.counters import CountersMixin
+
 MAX_LENGHT_NAME = 150
 MAX_LENGHT_EMAIL = 254
 
 
-class User(AbstractUser):
+class User(CountersMixin, AbstractUser):
+    counter_fields = ('recipes_count',)
+
     email = models.EmailField(
         verbose_name='Адрес электронной почты',
         max_length=MAX_LENGHT_EMAIL,
@@ -20,6 +24,11 @@ class User(AbstractUser):
         verbose_name='Фамилия',
         max_length=MAX_LENGHT_NAME,
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
@@ -43,13 +52,15 @@ class Follow(models.Model):
         User,
         related_name='follower',
         verbose_name='Подписчик',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     author = models.ForeignKey(
         User,
         related_name='following',
         verbose_name='Автор',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
     class Meta:
@@ -60,6 +71,12 @@ class Follow(models.Model):
                 fields=['author', 'user'],
                 name='unique_follow')
         ]
+        indexes = [
+            models.Index(
+                fields=('user', 'author'),
+                name='follow_user_author_idx'
+            )
+        ]
 
     def __str__(self):
         return f'Автор: {self.author}, подписчик: {self.user}'